@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+#H##############################################################################
+# FILE:	      batch.py
+# PROJECT:    Bunny the Defender
+# AUTHOR:
+# START DATE: 18 Oct 2026
+#
+# DESCRIPTION:
+# 	Runs many headless games in parallel on all CPU cores and reports
+# 	their outcomes. Every game gets its own seed and an input policy,
+# 	and the difficulty parameters of the game can be overridden with
+# 	lists of values to compare, which makes it a tool for tuning the
+# 	difficulty.
+#
+###
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import concurrent.futures
+from libs import inputsource
+from libs import policy
+
+# Game attributes which may be overridden with --set, with their default
+# values in Game.
+TUNABLE = {
+	"badgerBaseTime": 100,
+	"badMinDmg": 5,
+	"badMaxDmg": 20,
+	"wintime": 90000}
+
+class SweepPolicy(policy.InputPolicy):
+	"""Input policy of a player who stands still, sweeps the mouse up
+	and down the right part of the screen and shoots every fourth tick.
+	The seed shifts where the sweep starts."""
+
+	def __init__(self, seed):
+		self.tick = seed * 37
+
+	def decide(self, game):
+		events = []
+		if self.tick % 4 == 0:
+			events.append(inputsource.click((500, 240)))
+		mousePos = (500, 60 + self.tick * 3 % 360)
+		self.tick += 1
+		return mousePos, events
+
+def idlePolicy(seed):
+	"""Input policy of a player who does nothing."""
+
+	return policy.InputPolicy()
+
+def botPolicy(seed):
+	"""Input policy of the aiming bot."""
+
+	import game
+
+	return policy.AimBot(game.Arrow.speed)
+
+POLICIES = {
+	"idle": idlePolicy,
+	"sweep": SweepPolicy,
+	"bot": botPolicy}
+
+def runSession(job):
+	"""Plays one headless game to its end.
+
+	Args:
+		job (tuple): Index of the configuration, seed, name of the input
+			policy and a dict of game attributes to override.
+
+	Returns:
+		dict: Outcome of the game.
+	"""
+
+	import game
+
+	config, seed, policyName, settings = job
+	source = policy.PolicyInput(POLICIES[policyName](seed))
+	session = game.Game(headless=True, inputSource=source,
+		rng=random.Random(seed))
+	source.game = session
+	for name, value in settings.items():
+		setattr(session, name, value)
+	win = session.run()
+	return {
+		"config": config,
+		"seed": seed,
+		"win": bool(win),
+		"ticks": session.ticks,
+		"kills": session.kills,
+		"shots": session.shotArrows,
+		"castleHealth": session.castleHealth}
+
+def configurations(overrides):
+	"""Returns every combination of the overridden values.
+
+	Args:
+		overrides (list of tuple): Pairs of an attribute name and a list
+			of its values.
+
+	Returns:
+		list of dict: Attribute values of every configuration.
+
+	Raises:
+		ValueError: A configuration has a higher minimum than maximum
+			damage of badgers.
+	"""
+
+	names = [name for name, values in overrides]
+	configs = [dict(zip(names, values)) for values in
+		itertools.product(*(values for name, values in overrides))]
+	for settings in configs:
+		values = dict(TUNABLE, **settings)
+		if values["badMinDmg"] > values["badMaxDmg"]:
+			raise ValueError("badMinDmg={} is greater than badMaxDmg={}".format(
+				values["badMinDmg"], values["badMaxDmg"]))
+	return configs
+
+def runBatch(configs, seeds, policyName, workers):
+	"""Plays all the configurations with all the seeds in parallel.
+
+	Returns:
+		list of dict: Outcomes of the games.
+	"""
+
+	jobs = [(index, seed, policyName, settings)
+		for index, settings in enumerate(configs) for seed in seeds]
+	with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+		return list(executor.map(runSession, jobs))
+
+def summarize(configs, results):
+	"""Aggregates the outcomes per configuration.
+
+	Returns:
+		list of dict: Statistics of every configuration.
+	"""
+
+	summaries = []
+	for index, settings in enumerate(configs):
+		games = [result for result in results if result["config"] == index]
+		count = len(games)
+		shots = sum(result["shots"] for result in games)
+		kills = sum(result["kills"] for result in games)
+		summaries.append({
+			"settings": settings,
+			"games": count,
+			"winRate": sum(result["win"] for result in games) / count,
+			"kills": kills / count,
+			"accuracy": kills / shots if shots else 0.0,
+			"castleHealth": sum(result["castleHealth"]
+				for result in games) / count,
+			"ticks": sum(result["ticks"] for result in games) / count})
+	return summaries
+
+def printReport(summaries, seconds):
+	"""Prints the statistics of all configurations as a table."""
+
+	print("{:<40} {:>6} {:>6} {:>7} {:>9} {:>7} {:>7}".format("settings",
+		"games", "wins", "kills", "accuracy", "health", "ticks"))
+	for summary in summaries:
+		settings = " ".join("{}={}".format(name, value)
+			for name, value in summary["settings"].items()) or "defaults"
+		print("{:<40} {:>6} {:>5.0f}% {:>7.1f} {:>8.1f}% {:>7.1f} {:>7.0f}".format(
+			settings, summary["games"], summary["winRate"] * 100,
+			summary["kills"], summary["accuracy"] * 100,
+			summary["castleHealth"], summary["ticks"]))
+	games = sum(summary["games"] for summary in summaries)
+	ticks = sum(summary["ticks"] * summary["games"] for summary in summaries)
+	print("\n{} games in {:.1f} s, {:.0f} ticks/s".format(games, seconds,
+		ticks / seconds))
+
+def parseOverride(text):
+	"""Parses a NAME=VALUE[,VALUE...] argument of --set."""
+
+	name, _, values = text.partition("=")
+	if name not in TUNABLE:
+		raise argparse.ArgumentTypeError("{} is not one of {}".format(name,
+			", ".join(TUNABLE)))
+	try:
+		return name, [int(value) for value in values.split(",")]
+	except ValueError:
+		raise argparse.ArgumentTypeError("values of {} must be integers".format(
+			name))
+
+if __name__ == "__main__":
+	os.chdir(os.path.dirname(os.path.abspath(__file__)))
+	sys.path.insert(0, os.getcwd())
+	import game
+
+	parser = argparse.ArgumentParser(
+		description="Play many headless games of Bunny the Defender")
+	parser.add_argument("--games", type=game.positiveInt, default=os.cpu_count() or 1,
+		help="games per configuration (default: number of CPUs)")
+	parser.add_argument("--first-seed", type=int, default=0,
+		help="seed of the first game, the next ones count up (default: 0)")
+	parser.add_argument("--policy", choices=sorted(POLICIES), default="sweep",
+		help="how the player plays (default: sweep)")
+	parser.add_argument("--set", type=parseOverride, action="append",
+		default=[], metavar="NAME=VALUES",
+		help="override a game parameter, comma separated values are "
+			"compared, e.g. badgerBaseTime=80,100")
+	parser.add_argument("--workers", type=game.positiveInt,
+		help="number of processes (default: number of CPUs)")
+	parser.add_argument("--json", metavar="FILE",
+		help="also write the outcomes of all games to a JSON file")
+	args = parser.parse_args()
+
+	try:
+		configs = configurations(args.set)
+	except ValueError as error:
+		parser.error(str(error))
+	seeds = range(args.first_seed, args.first_seed + args.games)
+	start = time.perf_counter()
+	results = runBatch(configs, seeds, args.policy, args.workers)
+	summaries = summarize(configs, results)
+	printReport(summaries, time.perf_counter() - start)
+	if args.json:
+		with open(args.json, "w") as output:
+			json.dump({"summaries": summaries, "games": results}, output,
+				indent=1)
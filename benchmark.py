@@ -0,0 +1,321 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+#H##############################################################################
+# FILE:	      benchmark.py
+# PROJECT:    Bunny the Defender
+# AUTHOR:
+# START DATE: 18 Oct 2026
+#
+# DESCRIPTION:
+# 	Compares performance of the historical versions of the game kept in
+# 	versions/ with the current game.py. Every version runs in its own
+# 	process on dummy display and audio drivers and is fed the same
+# 	scripted input, one input frame per loop iteration.
+#
+###
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import tracemalloc
+
+# Loop phases timed when the game has a Game class. Times are inclusive,
+# a phase calling another one contains its time too.
+PHASES = (
+	"redrawScreen",
+	"handleEvents",
+	"movePlayer",
+	"moveEntity",
+	"moveArrow",
+	"handleArrows",
+	"handleBadgers",
+	"badgerTimer",
+	"checkEndGame")
+
+# Images which were renamed after the old versions were written.
+RENAMED_IMAGES = {
+	"dude.png": "bunny.png",
+	"bullet.png": "arrow.png"}
+
+class Finished(Exception):
+	"""Raised to leave the game loop after the requested number of
+	frames."""
+
+def findVersions():
+	"""Returns paths of all benchmarkable games, oldest first.
+
+	Returns:
+		list of tuple: Pairs of (name, path).
+	"""
+
+	versions = []
+	for name in os.listdir("versions"):
+		path = os.path.join("versions", name, "game.py")
+		if os.path.isfile(path):
+			versions.append((name, path))
+	versions.sort(key=lambda item: tuple(int(part) for part in item[0].split(".")))
+	versions.append(("current", "game.py"))
+	versions.append(("current-headless", "game.py"))
+	return versions
+
+def script(ticks):
+	"""Generates the input shared by all versions.
+
+	The bunny walks around in a square, follows a mouse sweeping up and
+	down the right part of the screen and shoots every fourth tick.
+
+	Args:
+		ticks (int): Number of input frames to generate.
+
+	Yields:
+		tuple: Pairs of (mousePos, events) for inputsource.ScriptedInput.
+	"""
+
+	from pygame.locals import K_w, K_a, K_s, K_d
+	from libs import inputsource
+
+	walk = (K_w, K_d, K_s, K_a)
+	for tick in range(ticks):
+		events = []
+		if tick % 30 == 0:
+			if tick > 0:
+				events.append(inputsource.keyUp(walk[(tick // 30 - 1) % 4]))
+			events.append(inputsource.keyDown(walk[tick // 30 % 4]))
+		if tick % 4 == 0:
+			events.append(inputsource.click((500, 240)))
+		mousePos = (500, 60 + tick * 3 % 360)
+		yield (mousePos, events)
+
+def patchPygame(pygame, frames, stats):
+	"""Replaces pygame functions so that a game can run unattended.
+
+	Args:
+		pygame (module): The pygame module.
+		frames (int): Number of frames after which Finished is raised.
+		stats (dict): Gets the time of the first and the last frame.
+	"""
+
+	from libs import inputsource
+
+	scripted = inputsource.ScriptedInput(script(frames + 1))
+	pygame.event.get = scripted.getEvents
+	pygame.mouse.get_pos = scripted.getMousePos
+
+	def frameDone(*args):
+		now = time.perf_counter()
+		stats["frames"] += 1
+		if stats["frames"] == 1:
+			stats["firstFrame"] = now
+		if stats["frames"] > frames:
+			stats["lastFrame"] = now
+			raise Finished()
+	pygame.display.flip = frameDone
+	pygame.display.update = frameDone
+
+	load = pygame.image.load
+	def loadImage(path, *args):
+		if not os.path.exists(path):
+			name = os.path.basename(path)
+			path = os.path.join("resources/images",
+				RENAMED_IMAGES.get(name, "notfound.png"))
+		return load(path, *args)
+	pygame.image.load = loadImage
+
+	loadMusic = pygame.mixer.music.load
+	playMusic = pygame.mixer.music.play
+	def loadMusicIfExists(path, *args):
+		if os.path.exists(path):
+			stats["music"] = True
+			return loadMusic(path, *args)
+	def playMusicIfLoaded(*args):
+		if stats.get("music"):
+			return playMusic(*args)
+	pygame.mixer.music.load = loadMusicIfExists
+	pygame.mixer.music.play = playMusicIfLoaded
+
+def wrapPhases(gameClass, phaseTimes):
+	"""Replaces loop phases of a Game class by timed wrappers.
+
+	Args:
+		gameClass (type): The Game class of a version.
+		phaseTimes (dict): Gets the total time of every phase.
+	"""
+
+	def timed(name, method):
+		def wrapper(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return method(*args, **kwargs)
+			finally:
+				phaseTimes[name] = (phaseTimes.get(name, 0.0) +
+					time.perf_counter() - start)
+		return wrapper
+
+	for name in PHASES:
+		method = gameClass.__dict__.get(name)
+		if method is not None:
+			setattr(gameClass, name, timed(name, method))
+
+def runSingle(name, path, frames, traceMemory):
+	"""Benchmarks a single version in the current process.
+
+	Args:
+		name (str): Name of the version.
+		path (str): Path to its game.py.
+		frames (int): Number of loop iterations to measure.
+		traceMemory (bool): Whether to trace Python allocations. Slows
+			the game down.
+
+	Returns:
+		dict: Results of the run.
+	"""
+
+	import importlib.util
+	import pygame
+
+	random.seed(0)
+	stats = {"frames": 0}
+	phaseTimes = {}
+	patchPygame(pygame, frames, stats)
+	if traceMemory:
+		tracemalloc.start()
+
+	start = time.perf_counter()
+	try:
+		spec = importlib.util.spec_from_file_location("benchmarked", path)
+		module = importlib.util.module_from_spec(spec)
+		spec.loader.exec_module(module)
+		if hasattr(module, "Game"):
+			wrapPhases(module.Game, phaseTimes)
+			if name == "current-headless":
+				game = module.Game(headless=True,
+					inputSource=module.inputsource.ScriptedInput(script(frames + 1)),
+					rng=random.Random(0))
+				stats["firstFrame"] = time.perf_counter()
+				for _ in range(frames):
+					game.update()
+				stats["frames"] = frames + 1
+				stats["lastFrame"] = time.perf_counter()
+			elif hasattr(module.Game, "update"):
+				game = module.Game(inputSource=module.inputsource.PygameInput(),
+					rng=random.Random(0))
+				while True:
+					game.update()
+					game.redrawScreen()
+			else:
+				module.Game().run()
+		elif hasattr(module, "main"):
+			module.main()
+	except Finished:
+		pass
+
+	result = {
+		"version": name,
+		"frames": stats["frames"] - 1,
+		"startup": stats.get("firstFrame", start) - start,
+		"maxRss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+	elapsed = stats.get("lastFrame", 0.0) - stats.get("firstFrame", 0.0)
+	result["ticksPerSecond"] = result["frames"] / elapsed if elapsed > 0 else 0.0
+	if result["frames"] > 0:
+		result["phases"] = dict((phase, total / result["frames"])
+			for phase, total in phaseTimes.items())
+	else:
+		result["phases"] = {}
+	if traceMemory:
+		result["pythonPeak"] = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return result
+
+def runAll(versions, frames, traceMemory):
+	"""Benchmarks versions, each in its own process.
+
+	Returns:
+		list of dict: Results of the runs, failed runs have an 'error'.
+	"""
+
+	results = []
+	env = dict(os.environ,
+		SDL_VIDEODRIVER="dummy",
+		SDL_AUDIODRIVER="dummy",
+		PYGAME_HIDE_SUPPORT_PROMPT="1")
+	for name, path in versions:
+		command = [sys.executable, __file__, "--single", name, path,
+			"--frames", str(frames)]
+		if traceMemory:
+			command.append("--trace-memory")
+		process = subprocess.run(command, env=env, stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE, universal_newlines=True)
+		lines = process.stdout.strip().splitlines()
+		if process.returncode == 0 and lines:
+			results.append(json.loads(lines[-1]))
+		else:
+			error = process.stderr.strip().splitlines()
+			results.append({"version": name,
+				"error": error[-1] if error else "exit code {}".format(process.returncode)})
+	return results
+
+def printReport(results):
+	"""Prints results as a table followed by per-phase costs."""
+
+	print("{:<18}{:>10}{:>10}{:>11}{:>10}{:>12}".format(
+		"version", "ticks/s", "ms/tick", "startup s", "RSS MB", "py peak KB"))
+	for result in results:
+		if "error" in result:
+			print("{:<18}failed: {}".format(result["version"], result["error"]))
+			continue
+		rate = result["ticksPerSecond"]
+		peak = result.get("pythonPeak")
+		print("{:<18}{:>10.0f}{:>10.3f}{:>11.2f}{:>10.1f}{:>12}".format(
+			result["version"], rate, 1000 / rate if rate else 0.0,
+			result["startup"], result["maxRss"] / 1024,
+			"-" if peak is None else "{:.0f}".format(peak / 1024)))
+	print()
+	print("Per-phase cost in ms per tick:")
+	for result in results:
+		phases = result.get("phases")
+		if phases:
+			print("  {:<18}".format(result["version"]) + ", ".join(
+				"{} {:.3f}".format(phase, seconds * 1000)
+				for phase, seconds in sorted(phases.items(),
+					key=lambda item: PHASES.index(item[0]))))
+
+if __name__ == "__main__":
+	os.chdir(os.path.dirname(os.path.abspath(__file__)))
+	sys.path.insert(0, os.getcwd())
+
+	parser = argparse.ArgumentParser(
+		description="Benchmark the versions of Bunny the Defender")
+	parser.add_argument("versions", nargs="*", metavar="VERSION",
+		help="versions to run, e.g. 0.4.3 or current (default: all)")
+	parser.add_argument("--frames", type=int, default=1000,
+		help="loop iterations to measure (default: 1000)")
+	parser.add_argument("--trace-memory", action="store_true",
+		help="report peak Python allocations, slows the games down")
+	parser.add_argument("--json", metavar="FILE",
+		help="also write the results to a JSON file")
+	parser.add_argument("--single", nargs=2, metavar=("NAME", "PATH"),
+		help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.single:
+		result = runSingle(args.single[0], args.single[1], args.frames,
+			args.trace_memory)
+		sys.stdout.flush()
+		print(json.dumps(result))
+		sys.exit(0)
+
+	versions = findVersions()
+	if args.versions:
+		versions = [version for version in versions
+			if version[0] in args.versions]
+	results = runAll(versions, args.frames, args.trace_memory)
+	printReport(results)
+	if args.json:
+		with open(args.json, "w") as output:
+			json.dump(results, output, indent=1)
@@ -6,7 +6,7 @@
 # PROJECT:    Bunny the Defender
 # AUTHOR:     David Has
 # START DATE: 2 Sep 2018
-# VERSION:    0.6.1
+# VERSION:    0.6.24
 #
 # DESCRIPTION:
 # 	Game, where a bunny defends castles againgst an army of badgers.
@@ -26,31 +26,96 @@
 # 0.5.0   05Sep18 DH      Implementing arrows.
 # 0.6.0   02Nov18 DH      Added badgers, sounds, battle system and statistics.
 # 0.6.1   02Nov18 DH      Adjusted the badger timer.
+# 0.6.2   18Oct26         Caching rotated images of arrows and the bunny.
+# 0.6.3   18Oct26         Spatial hash broadphase for arrow collisions.
+# 0.6.4   18Oct26         Optional NumPy storage of arrows and badgers.
+# 0.6.5   18Oct26         Headless mode with scripted input.
+# 0.6.6   18Oct26         Fixed timestep game loop with interpolation.
+# 0.6.7   18Oct26         Redrawing only the changed parts of the screen.
+# 0.6.8   18Oct26         Layered background composed once.
+# 0.6.9   18Oct26         Cached rendering of texts and the health bar.
+# 0.6.10  18Oct26         Frame time profiler.
+# 0.6.11  18Oct26         Moving entities without allocating points.
+# 0.6.12  18Oct26         Vectorized collisions with the entity store.
+# 0.6.13  18Oct26         Removing entities safely in constant time.
+# 0.6.14  18Oct26         Pooling arrows and badgers.
+# 0.6.15  18Oct26         Lazily loaded and converted assets.
+# 0.6.16  18Oct26         Sprites served from a texture atlas.
+# 0.6.17  18Oct26         Loading decoded assets from a baked cache.
+# 0.6.18  18Oct26         Badger animation driven by the game clock.
+# 0.6.19  18Oct26         Sound effects throttled in channel groups.
+# 0.6.20  18Oct26         Streamed music, no crash without the track.
+# 0.6.21  18Oct26         Seedable random number generator.
+# 0.6.22  18Oct26         Recording and replaying of input.
+# 0.6.23  18Oct26         Snapshots of the simulation state.
+# 0.6.24  18Oct26         Aiming bot playing the game.
 #
 ###
 
+import os
+import atexit
+import argparse
 import pygame
 from pygame.locals import *
 import math
+import struct
+import zlib
 from libs import point
+from libs import assets
+from libs import atlas
+from libs import animation
+from libs import audio
+from libs import music
+from libs import bake
+from libs import spatialhash
+from libs import entitystore
+from libs import geometry
+from libs import slotmap
+from libs import pool
+from libs import inputsource
+from libs import inputlog
+from libs import policy
+from libs import gameloop
+from libs import renderer
+from libs import background
+from libs import hud
+from libs import profiler
 import random
 
+assetManager = assets.AssetManager()
+
+# Layout of Game.snapshot(): a header with the game counters, the player
+# and the entity counts, the state of the random generator, then one
+# record per arrow and per badger.
+SNAPSHOT_MAGIC = b"BNSS"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHiiiiiiiiiBbBddddII")
+_SNAPSHOT_RANDOM = struct.Struct("<B625IBd")
+_SNAPSHOT_ARROW = struct.Struct("<ddddd")
+_SNAPSHOT_BADGER = struct.Struct("<ddqdd")
+_SNAPSHOT_KEYS = ("w", "a", "s", "d")
+
 class Arrow():
 	"""Represents an arrow projectile.
 
 	Note:
-		Do not use 'origImage' or 'pos' attributes to draw the entity.
-		Instead, use the 'image' attribute and 'drawPos' property.
+		Do not use the 'pos' attribute to draw the entity. Instead, use
+		the 'image' and 'drawPos' properties.
 
 	Attributes:
 		pos (point.Point): Current entity position. Holds coordinates of
 			the center of the image. Do not use this to draw the
 			entity, as top left corner needs to be used instead.
-		origImage (pygame.Surface): This class attribute contains an
-			unchanged original entity image.
-		speed (int): How many pixels per tick the entity travels.
+		imagePath (str): This class attribute contains the path of the
+			unrotated entity image.
+		prevPos (tuple of float): Position at the start of the last
+			tick. Used to interpolate drawing between ticks. Stale
+			when the arrow is in an entity store, use previousPos().
+		speed (int): This class attribute contains how many pixels per
+			tick the entity travels.
 		angle (float): An angle by which the entity is rotated. Angle is
 			in radians.
+		velocity (point.Point): Vector the entity moves by every tick.
 
 	Properties:
 		drawPos (point.Point): Returns a top left corner of the entity
@@ -58,9 +123,10 @@ class Arrow():
 		image (pygame.Surface): Returns an image edited for drawing.
 	"""
 
-	origImage = pygame.image.load("resources/images/arrow.png")
+	imagePath = "resources/images/arrow.png"
+	speed = 10
 
-	def __init__(self, playerPos, playerAngle):
+	def __init__(self, playerPos, playerAngle, store=None):
 		"""Initializes an Arrow instance.
 
 		Args:
@@ -68,44 +134,71 @@ class Arrow():
 				fired.
 			playerAngle (float): Angle of the player when fired in
 				radians.
+			store (entitystore.EntityStore): Optional store to keep
+				the position in. The arrow is then moved by the
+				store.
 		"""
 
-		self.pos = playerPos.clone()
+		self.velocity = point.Point()
+		self.pos = None
+		self.reset(playerPos, playerAngle, store)
+
+	def reset(self, playerPos, playerAngle, store=None):
+		"""Prepares the arrow to be fired again. Takes the same arguments
+		as the constructor."""
+
 		self.angle = -playerAngle 
-		self.speed = 10
+		self.velocity.move_to(self.speed * math.cos(self.angle),
+			self.speed * math.sin(self.angle))
+		if store is None:
+			if self.pos is None:
+				self.pos = playerPos.clone()
+			else:
+				self.pos.move_to(playerPos.x, playerPos.y)
+		else:
+			width, height = self.image.get_size()
+			self.pos = store.add(self, playerPos.x, playerPos.y,
+				self.angle, self.speed, width, height)
+		self.prevPos = (playerPos.x, playerPos.y)
 
 	def get_rect(self):
 		"""Returns a pygame.Rect of the object."""
 
+		width, height = self.image.get_size()
 		return pygame.Rect(
-			self.drawPos.x,
-			self.drawPos.y,
-			self.image.get_width(),
-			self.image.get_height())
+			self.pos.x - width / 2,
+			self.pos.y - height / 2,
+			width,
+			height)
 
 	@property
 	def drawPos(self):
-		return point.Point(self.pos.x - self.image.get_width() / 2,
-			self.pos.y - self.image.get_height() / 2)
+		width, height = self.image.get_size()
+		return point.Point(self.pos.x - width / 2, self.pos.y - height / 2)
 
 	@property
 	def image(self):
-		return pygame.transform.rotate(Arrow.origImage, -self.angle * 180/math.pi)
+		rotations = assetManager.rotations(Arrow.imagePath)
+		return rotations.get(-self.angle * 180/math.pi)
 
 class Player():
 	"""Represents a player entity.
 
 	Note:
-		Do not use 'origImage' or 'pos' attributes to draw the entity.
-		Instead, use the 'image' attribute and 'drawPos' property.
+		Do not use the 'pos' attribute to draw the entity. Instead, use
+		the 'image' and 'drawPos' properties.
 
 	Attributes:
 		pos (point.Point): Current entity position. Holds coordinates of
 			the center of the image. Do not use this to draw the
 			entity, as top left corner needs to be used instead.
-		origImage (pygame.Surface): Contains an unchanged original entity
-			image.
+		imagePath (str): This class attribute contains the path of the
+			unrotated entity image.
+		prevPos (tuple of float): Position at the start of the last
+			tick. Used to interpolate drawing between ticks.
 		speed (int): How many pixels per tick the entity travels.
+		input (inputsource.PygameInput): Source of the mouse position
+			the entity turns to.
 
 	Properties:
 		drawPos (point.Point): Returns a top left corner of the entity
@@ -117,15 +210,28 @@ class Player():
 		image (pygame.Surface): Returns an image edited for drawing.
 	"""
 
-	def __init__(self):
-		self.origImage = pygame.image.load("resources/images/bunny.png")
+	imagePath = "resources/images/bunny.png"
+
+	def __init__(self, inputSource, preload=True):
+		"""Initializes a Player instance.
+
+		Args:
+			inputSource (inputsource.PygameInput): Source of the
+				mouse position.
+			preload (bool): Whether to pre-render the rotated images
+				right away.
+		"""
+
+		assetManager.rotations(Player.imagePath, preload=preload)
+		self.input = inputSource
 		self.pos = point.Point(100, 100)
+		self.prevPos = self.pos.as_tuple()
 		self.speed = 5
 
 	@property
 	def drawPos(self):
-		return point.Point(self.pos.x - self.image.get_width() / 2,
-			self.pos.y - self.image.get_height() / 2)
+		width, height = self.image.get_size()
+		return point.Point(self.pos.x - width / 2, self.pos.y - height / 2)
 
 	@property
 	def diagonalSpeed(self):
@@ -133,14 +239,15 @@ class Player():
 
 	@property
 	def angle(self):
-		direction = pygame.mouse.get_pos()
+		direction = self.input.getMousePos()
 		alpha = math.atan2(direction[0] - self.pos.x, direction[1] - self.pos.y)
 		alpha -= math.pi/2 # Angle correction
 		return alpha
 
 	@property
 	def image(self):
-		return pygame.transform.rotate(self.origImage, self.angle * 180/math.pi)
+		rotations = assetManager.rotations(Player.imagePath)
+		return rotations.get(self.angle * 180/math.pi)
 
 class Badger():
 	"""A badger entity.
@@ -148,30 +255,73 @@ class Badger():
 	These are the enemies the bunny is supposed to shoot.
 
 	Note:
-		Do not use 'origImage' or 'pos' attributes to draw the entity.
-		Instead, use the 'image' attribute and 'drawPos' property.
+		Do not use the 'pos' attribute to draw the entity. Instead, use
+		imageAt() and the 'drawPos' property.
+
+	Attributes:
+		imagePaths (tuple of str): This class attribute contains paths
+			of the animation frames.
+		animation (animation.FrameTable): This class attribute contains
+			the animation frames shared by all badgers. Created by
+			createAnimation().
+		velocity (point.FrozenPoint): Vector the entity moves by every
+			tick.
+		spawnTick (int): Game tick the badger was spawned at, the
+			start of its animation.
 
 	Properties:
 		drawPos (point.Point): Returns a top left corner of the entity
 			image. Use this to draw the entity.
 	"""
 
-	origImage1 = pygame.image.load("resources/images/badguy.png")
-	origImage2 = pygame.image.load("resources/images/badguy2.png")
-	origImage3 = pygame.image.load("resources/images/badguy3.png")
-	origImage4 = pygame.image.load("resources/images/badguy4.png")
+	imagePaths = (
+		"resources/images/badguy.png",
+		"resources/images/badguy2.png",
+		"resources/images/badguy3.png",
+		"resources/images/badguy4.png")
+	animation = None
 
-	def __init__(self, spawnPos):
+	@classmethod
+	def createAnimation(cls, tickRate):
+		"""Builds the animation shared by all badgers.
+
+		Args:
+			tickRate (int): Number of game ticks per second. Frames
+				change ten times per second.
+		"""
+
+		cls.animation = animation.FrameTable(
+			[assetManager.image(path) for path in cls.imagePaths],
+			max(1, round(tickRate / 10)))
+
+	def __init__(self, spawnPos, store=None, tick=0):
 		"""Initializes a Badger instance.
 
 		Args:
 			spawnPos (point.Point): Spawning position of the badger.
+			store (entitystore.EntityStore): Optional store to keep
+				the position in. The badger is then moved by the
+				store.
+			tick (int): Current game tick.
 		"""
 
-		self.pos = spawnPos
 		self.speed = 5
-		self.imageChangeCountdown = 0
-		self._image = Badger.origImage1
+		self.velocity = point.FrozenPoint(-self.speed, 0)
+		self.reset(spawnPos, store, tick)
+
+	def reset(self, spawnPos, store=None, tick=0):
+		"""Prepares the badger to be spawned again. Takes the same
+		arguments as the constructor."""
+
+		self.spawnTick = tick
+		self._image = assetManager.image(Badger.imagePaths[0])
+		if store is None:
+			self.pos = spawnPos
+		else:
+			width, height = self._image.get_size()
+			self.pos = store.add(self, spawnPos.x, spawnPos.y,
+				math.pi, self.speed, width, height)
+		self.prevPos = (spawnPos.x, spawnPos.y)
 
 	def move(self, vector):
 		"""Moves the entity by adding the specified vector.
@@ -185,32 +335,69 @@ class Badger():
 	def get_rect(self):
 		"""Returns a pygame.Rect of the object."""
 
+		width, height = self._image.get_size()
 		return pygame.Rect(
-			self.drawPos.x,
-			self.drawPos.y,
-			self._image.get_width(),
-			self._image.get_height())
+			self.pos.x - width / 2,
+			self.pos.y - height / 2,
+			width,
+			height)
 
 	@property
 	def drawPos(self):
-		return point.Point(self.pos.x - self._image.get_width() / 2,
-			self.pos.y - self._image.get_height() / 2)
+		width, height = self._image.get_size()
+		return point.Point(self.pos.x - width / 2, self.pos.y - height / 2)
 
-	@property
-	def image(self):
-		if self.imageChangeCountdown == 0:
-			self.imageChangeCountdown = 5
-			if self._image == Badger.origImage1:
-				self._image = Badger.origImage2
-			elif self._image == Badger.origImage2:
-				self._image = Badger.origImage3
-			elif self._image == Badger.origImage3:
-				self._image = Badger.origImage4
-			elif self._image == Badger.origImage4:
-				self._image = Badger.origImage1
-		else:
-			self.imageChangeCountdown -= 1
-		return self._image
+	def imageAt(self, tick):
+		"""Returns the animation frame to draw at a game tick. All the
+		frames have the same size."""
+
+		return Badger.animation.frame(tick - self.spawnTick)
+
+def previousPos(entity):
+	"""Returns the position of an entity at the start of the last tick.
+
+	Entities kept in an entity store have it in the store, the others
+	in their 'prevPos' attribute.
+	"""
+
+	if isinstance(entity.pos, entitystore.StorePoint):
+		return entity.pos.prevPos
+	return entity.prevPos
+
+def setPreviousPos(entity, prevPos):
+	"""Sets the position of an entity at the start of the last tick."""
+
+	if isinstance(entity.pos, entitystore.StorePoint):
+		entity.pos.prevPos = prevPos
+	else:
+		entity.prevPos = prevPos
+
+def interpolatedDrawPos(entity, image, alpha):
+	"""Returns the top left corner to draw an entity between two ticks.
+
+	Args:
+		entity (Arrow, Badger or Player): The entity to draw.
+		image (pygame.Surface): The image the entity is drawn with.
+		alpha (float): How far between the previous and the current
+			tick to draw, from 0 to 1.
+
+	Returns:
+		tuple of float: Top left corner of the image.
+	"""
+
+	prevX, prevY = previousPos(entity)
+	x = prevX + (entity.pos.x - prevX) * alpha
+	y = prevY + (entity.pos.y - prevY) * alpha
+	return (x - image.get_width() / 2, y - image.get_height() / 2)
+
+class SilentSound():
+	"""Stands in for pygame.mixer.Sound when audio is disabled."""
+
+	def play(self, *args, **kwargs):
+		pass
+
+	def set_volume(self, volume):
+		pass
 
 class Game():
 	"""Contains general information about game and window.
@@ -228,22 +415,153 @@ class Game():
 		castleImage (pygame.Surface): Image of the castle.
 		grassImage (pygame.Surface): Image of the grass.
 		castlePos (tuple of point.Point): Tuple containing positions
-			of the castles.
-		arrowList (list of Arrow): List of all arrows currently present
-			on the game screen.
+			of the castles. Call background.invalidate("castles")
+			after changing them.
+		background (background.LayeredBackground): Cached grass and
+			castles drawn behind everything else.
+		arrowList (slotmap.SlotMap of Arrow): All arrows currently
+			present on the game screen. Arrows may be removed while
+			iterating over it.
+		badgerList (slotmap.SlotMap of Badger): All badgers currently
+			present on the game screen. Badgers may be removed while
+			iterating over it.
+		arrowPool (pool.ObjectPool): Recycles removed arrows.
+		badgerPool (pool.ObjectPool): Recycles removed badgers.
+		arrowGrid (spatialhash.SpatialHash): Broadphase grid of arrows,
+			rebuilt every tick in handleBadgers().
+		arrowStore (entitystore.EntityStore): Arrays holding arrow
+			positions, or None when entities are updated one by one.
+		badgerStore (entitystore.EntityStore): Arrays holding badger
+			positions, or None when entities are updated one by one.
+		headless (bool): Whether the game runs without display, audio
+			and rendering.
+		input (inputsource.PygameInput): Source of events and the
+			mouse position.
+		win (bool): Whether the game was won, None until it ends.
+		quitRequested (bool): Whether the player closed the window.
+		ticks (int): Number of game ticks simulated so far. It is the
+			only clock the simulation reads, see elapsed().
+		tickRate (int): Number of ticks per second of game time. The
+			game clock is derived from it. Speeds and the badger spawn
+			timer are counted in ticks, so the tick rate also sets
+			how fast the game plays.
+		maxFps (int): Maximum number of frames drawn per second.
+		rng (random.Random): Generator of badger positions and damage.
+		renderer (renderer.DirtyRectRenderer): Draws the screen, None
+			in headless mode.
+		hudText (hud.TextCache): Rendered texts of the kill counter and
+			the timer, None in headless mode.
+		healthBar (hud.HealthBar): Health bar of the castle, None in
+			headless mode.
+		audio (audio.AudioManager): Plays the sound effects, disabled
+			in headless mode.
+		music (music.MusicPlayer): Plays the background music, None in
+			headless mode.
+		profiler (profiler.FrameProfiler): Records how long the phases
+			of the game loop take, None when not profiling.
+		overlayFont (pygame.font.Font): Font of the profiler overlay,
+			None when the overlay is off.
 	"""
 
-	def __init__(self):
-		pygame.init()
-		pygame.font.init()
-		pygame.mixer.init()
-		self.gamefont = pygame.font.SysFont("Arial", 30)
-		self.player = Player()
-		self.loadImages()
-		self.loadAudio()
+	def __init__(self, entityStore=False, headless=False, inputSource=None,
+		tickRate=60, maxFps=120, frameProfiler=None, profileOverlay=False,
+		poolCapacity=256, atlasIndex=atlas.DEFAULT_INDEX,
+		bakedAssets=bake.DEFAULT_PATH, rng=None):
+		"""Initializes a Game instance.
+
+		Args:
+			entityStore (bool): Whether to keep arrows and badgers in
+				NumPy arrays and update them in bulk. Requires numpy.
+			headless (bool): Whether to run without display, audio
+				and rendering, as fast as possible.
+			inputSource (inputsource.PygameInput): Source of events
+				and the mouse position. Defaults to live pygame
+				input, or to no input at all in headless mode.
+			tickRate (int): Number of simulation ticks per second,
+				at least 1. The game is designed for 60, a higher rate
+				makes it faster and harder.
+			maxFps (int): Maximum number of frames drawn per second,
+				None for no limit.
+			frameProfiler (profiler.FrameProfiler): Profiler to
+				record the game loop phases with.
+			profileOverlay (bool): Whether to show the profiler
+				summary on screen.
+			poolCapacity (int): Number of removed arrows and badgers
+				kept for reuse, each.
+			atlasIndex (str): Index of the texture atlas to take the
+				sprites from. Sprites are loaded from separate files if
+				it is None or does not exist, and in headless mode,
+				which draws nothing.
+			bakedAssets (str): Cache of decoded assets to load assets
+				from. Assets are decoded from their files if it is None
+				or does not exist.
+			rng (random.Random): Source of all randomness of the
+				simulation. Pass a seeded one to make the game a pure
+				function of the seed and the input. Defaults to an
+				unseeded generator.
+
+		Raises:
+			ValueError: The tick rate is not positive.
+		"""
+
+		if tickRate <= 0:
+			raise ValueError("tick rate must be positive, not {}".format(
+				tickRate))
+		self.headless = headless
+		if inputSource is None:
+			if headless:
+				inputSource = inputsource.ScriptedInput([])
+			else:
+				inputSource = inputsource.PygameInput()
+		self.input = inputSource
+		if headless:
+			os.environ["SDL_VIDEODRIVER"] = "dummy"
+			os.environ["SDL_AUDIODRIVER"] = "dummy"
+			pygame.display.init()
+			self.gamefont = None
+		else:
+			pygame.init()
+			pygame.font.init()
+			pygame.mixer.init()
+			self.gamefont = pygame.font.SysFont("Arial", 30)
 		self.screen = pygame.display.set_mode((640, 480))
+		assetManager.convertImages = not headless
+		if (bakedAssets is not None and assetManager.baked is None and
+			os.path.exists(bakedAssets)):
+			assetManager.loadBaked(bakedAssets)
+		if (not headless and atlasIndex is not None and
+			assetManager.atlas is None and os.path.exists(atlasIndex)):
+			assetManager.loadAtlas(atlasIndex)
+		assetManager.convertAll()
+		self.player = Player(self.input, preload=not headless)
+		self.loadImages()
+		if headless:
+			self.hitSound = SilentSound()
+			self.enemySound = SilentSound()
+			self.shootSound = SilentSound()
+			self.music = None
+		else:
+			self.loadAudio()
+		self.audio = audio.AudioManager()
+		self.audio.addCategory("shoot", 3, 0.03)
+		self.audio.addCategory("hit", 3, 0.05)
+		self.audio.addCategory("enemy", 2, 0.1)
+		self.background = background.LayeredBackground(self.screen.get_size())
+		self.background.addLayer("grass", self.drawGrass)
+		self.background.addLayer("castles", self.drawCastles)
+		if headless:
+			self.renderer = None
+		else:
+			self.renderer = renderer.DirtyRectRenderer(self.screen,
+				self.background.surface)
+		self.ticks = 0
+		self.tickRate = tickRate
+		self.maxFps = maxFps
+		self.rng = rng if rng is not None else random.Random()
 		self.border = 40
 		self.running = True
+		self.win = None
+		self.quitRequested = False
 		self.wintime = 90000
 		self.badMinDmg = 5
 		self.badMaxDmg = 20
@@ -257,83 +575,126 @@ class Game():
 			'a': False,
 			's': False,
 			'd': False}
+		self.arrowList = slotmap.SlotMap()
+		self.badgerList = slotmap.SlotMap()
+		self.arrowPool = pool.ObjectPool(Arrow, Arrow.reset, poolCapacity)
+		self.badgerPool = pool.ObjectPool(Badger, Badger.reset, poolCapacity)
+		Badger.createAnimation(tickRate)
+		self.arrowGrid = spatialhash.SpatialHash(64)
+		if headless:
+			self.hudText = None
+			self.healthBar = None
+		else:
+			self.hudText = hud.TextCache(self.gamefont, (0,0,0))
+			self.healthBar = hud.HealthBar(self.healthBarImage,
+				self.healthImage, self.castleHealth)
+		if entityStore:
+			self.arrowStore = entitystore.EntityStore()
+			self.badgerStore = entitystore.EntityStore()
+		else:
+			self.arrowStore = None
+			self.badgerStore = None
+		self.profiler = frameProfiler
+		if frameProfiler is not None and profileOverlay and not headless:
+			self.overlayFont = pygame.font.SysFont("Arial", 14)
+		else:
+			self.overlayFont = None
+
+	def loadImages(self):
+		"""Loads images from resources/images."""
+
 		self.castlePos = (
 			point.Point(0, 30),
 			point.Point(0, 135),
 			point.Point(0, 240),
 			point.Point(0, 345))
-		self.arrowList = []
-		self.badgerList = []
-
-	def loadImages(self):
-		"""Loads images from resources/images."""
-
-		self.castleImage = pygame.image.load("resources/images/castle.png")
-		self.grassImage = pygame.image.load("resources/images/grass.png")
-		self.healthBarImage = pygame.image.load("resources/images/healthbar.png")
-		self.healthImage = pygame.image.load("resources/images/health.png")
-		self.gameOverImage = pygame.image.load("resources/images/gameover.png")
-		self.youWinImage = pygame.image.load("resources/images/youwin.png")
+		self.castleImage = assetManager.image("resources/images/castle.png")
+		self.grassImage = assetManager.image("resources/images/grass.png")
+		self.healthBarImage = assetManager.image("resources/images/healthbar.png")
+		self.healthImage = assetManager.image("resources/images/health.png")
 
 	def loadAudio(self):
 		"""Loads audio files from resources/audio."""
 
-		self.hitSound = pygame.mixer.Sound("resources/audio/explode.wav")
-		self.hitSound.set_volume(0.05)
-		self.enemySound = pygame.mixer.Sound("resources/audio/enemy.wav")
-		self.enemySound.set_volume(0.05)
-		self.shootSound = pygame.mixer.Sound("resources/audio/shoot.wav")
-		self.shootSound.set_volume(0.05)
-		self.music = pygame.mixer.music.load("resources/audio/moonlight.wav")
-		pygame.mixer.music.set_volume(0.25)
-		pygame.mixer.music.play(-1, 0.0)
-
-	def redrawScreen(self):
-		"""Redraws the game screen."""
-
-		self.screen.fill(0)
-		yRange = range(0, self.screen.get_height(), self.grassImage.get_height())
-		xRange = range(0, self.screen.get_width(), self.grassImage.get_width())
+		self.hitSound = assetManager.sound("resources/audio/explode.wav", 0.05)
+		self.enemySound = assetManager.sound("resources/audio/enemy.wav", 0.05)
+		self.shootSound = assetManager.sound("resources/audio/shoot.wav", 0.05)
+		self.music = music.MusicPlayer()
+		self.music.play("resources/audio/moonlight", 0.25)
+
+	def drawGrass(self, surface):
+		"""Tiles a surface with grass.
+
+		Args:
+			surface (pygame.Surface): Background layer to draw on.
+		"""
+
+		yRange = range(0, surface.get_height(), self.grassImage.get_height())
+		xRange = range(0, surface.get_width(), self.grassImage.get_width())
 		for y in yRange:
 			for x in xRange:
-				self.screen.blit(self.grassImage, (x, y))
+				surface.blit(self.grassImage, (x, y))
+
+	def drawCastles(self, surface):
+		"""Draws the castles on a surface.
+
+		Args:
+			surface (pygame.Surface): Background layer to draw on.
+		"""
+
 		for position in self.castlePos:
-			self.screen.blit(self.castleImage, position.as_tuple())
+			surface.blit(self.castleImage, position.as_tuple())
+
+	def redrawScreen(self, alpha=1.0):
+		"""Redraws the game screen.
+
+		Args:
+			alpha (float): How far between the previous and the
+				current tick to draw the moving entities, from 0
+				to 1.
+		"""
+
+		if self.background.dirty:
+			self.renderer.setBackground(self.background.surface)
+		draw = self.renderer.draw
+		self.renderer.begin()
 		for arrow in self.arrowList:
-			self.screen.blit(arrow.image, arrow.drawPos.as_tuple())
+			image = arrow.image
+			draw(image, interpolatedDrawPos(arrow, image, alpha))
 		for badger in self.badgerList:
-			self.screen.blit(badger.image, badger.drawPos.as_tuple())
-		self.screen.blit(self.player.image, self.player.drawPos.as_tuple())
+			image = badger.imageAt(self.ticks)
+			draw(image, interpolatedDrawPos(badger, image, alpha))
+		image = self.player.image
+		draw(image, interpolatedDrawPos(self.player, image, alpha))
 
-		killstext = self.gamefont.render(str(self.kills), False, (0,0,0))
+		killstext = self.hudText.render(str(self.kills))
 		textrect = killstext.get_rect()
 		textrect.topright = (635,35)
-		self.screen.blit(killstext, textrect)
+		draw(killstext, textrect)
 
-		ticks = pygame.time.get_ticks()
-		timeLeft = self.wintime - ticks
+		timeLeft = self.wintime - self.elapsed()
 		if timeLeft < 0:
 			timeLeft = 0
 		minutes = str(timeLeft // 60000)
 		seconds = str(timeLeft // 1000 % 60)
-		timetext = self.gamefont.render(minutes+":"+seconds.zfill(2), False, (0,0,0))
+		timetext = self.hudText.render(minutes+":"+seconds.zfill(2))
 		textrect = timetext.get_rect()
 		textrect.topright = (635,5)
-		self.screen.blit(timetext, textrect)
+		draw(timetext, textrect)
 
-		self.screen.blit(self.healthBarImage, (5,5))
-		for i in range(self.castleHealth):
-			self.screen.blit(self.healthImage, (8+i,8))
+		draw(self.healthBar.image(self.castleHealth), (5,5))
+		if self.overlayFont is not None:
+			self.profiler.drawOverlay(draw, self.overlayFont)
 
-		pygame.display.flip()
+		self.renderer.end()
 
 	def handleEvents(self):
 		"""Processes events and reacts to them."""
 
-		for event in pygame.event.get():
+		for event in self.input.getEvents():
 			if event.type == pygame.QUIT:
-				pygame.quit()
-				exit(0)
+				self.running = False
+				self.quitRequested = True
 			elif event.type == pygame.KEYDOWN:
 				if event.key == K_w:
 					self.keys['w'] = True
@@ -353,8 +714,9 @@ class Game():
 				elif event.key == K_d:
 					self.keys['d'] = False
 			elif event.type == pygame.MOUSEBUTTONDOWN:
-				self.arrowList.append(Arrow(self.player.pos, self.player.angle))
-				self.shootSound.play()
+				self.arrowList.append(self.arrowPool.acquire(
+					self.player.pos, self.player.angle, self.arrowStore))
+				self.audio.play("shoot", self.shootSound)
 				self.shotArrows += 1
 
 	def movePlayer(self, entity):
@@ -400,36 +762,119 @@ class Game():
 			if entity.pos.x < self.screen.get_width() - self.border - speed:
 				entity.pos.x += speed
 
+	def removeArrow(self, arrow):
+		"""Removes an arrow from the game.
+
+		Args:
+			arrow (Arrow): The arrow to remove.
+		"""
+
+		self.arrowList.remove(arrow)
+		if self.arrowStore is not None:
+			self.arrowStore.remove(arrow.pos.index)
+		self.arrowPool.release(arrow)
+
+	def removeBadger(self, badger):
+		"""Removes a badger from the game.
+
+		Args:
+			badger (Badger): The badger to remove.
+		"""
+
+		self.badgerList.remove(badger)
+		if self.badgerStore is not None:
+			self.badgerStore.remove(badger.pos.index)
+		self.badgerPool.release(badger)
+
 	def handleArrows(self):
 		"""Updates the arrow's position attribute."""
 
+		if self.arrowStore is not None:
+			self.arrowStore.integrate()
+			for index in self.arrowStore.outside(self.screen.get_rect()):
+				self.removeArrow(self.arrowStore.owners[index])
+			return
+
+		screenRect = self.screen.get_rect()
 		for arrow in self.arrowList:
-			arrow.pos.x += arrow.speed * math.cos(arrow.angle)
-			arrow.pos.y += arrow.speed * math.sin(arrow.angle)
-			if not self.screen.get_rect().contains(pygame.Rect(arrow.pos.x, arrow.pos.y, 0, 0)):
-				self.arrowList.remove(arrow)
+			arrow.pos += arrow.velocity
+			if not screenRect.contains((arrow.pos.x, arrow.pos.y, 0, 0)):
+				self.removeArrow(arrow)
 
 	def handleBadgers(self):
 		"""Updates the badgers' position."""
 
+		if self.badgerStore is not None:
+			self.collideStoredBadgers()
+		else:
+			self.collideBadgers()
+
+		castleLine = self.castleImage.get_width() + 20
+		if self.badgerStore is not None:
+			self.badgerStore.integrate()
+			for index in self.badgerStore.reached(castleLine):
+				self.removeBadger(self.badgerStore.owners[index])
+				self.castleHealth -= self.rng.randint(self.badMinDmg, self.badMaxDmg)
+				self.audio.play("hit", self.hitSound)
+			return
+
+		for badger in self.badgerList:
+			badger.move(badger.velocity)
+			if badger.pos.x <= castleLine:
+				self.removeBadger(badger)
+				self.castleHealth -= self.rng.randint(self.badMinDmg, self.badMaxDmg)
+				self.audio.play("hit", self.hitSound)
+
+	def hitBadger(self, badger, arrow):
+		"""Removes a badger hit by an arrow together with the arrow.
+
+		Args:
+			badger (Badger): The badger hit.
+			arrow (Arrow): The arrow which hit it.
+		"""
+
+		self.removeBadger(badger)
+		self.removeArrow(arrow)
+		self.kills += 1
+		self.audio.play("enemy", self.enemySound)
+
+	def collideStoredBadgers(self):
+		"""Resolves arrow hits in bulk when entities are in the entity
+		stores."""
+
+		if not len(self.badgerStore) or not len(self.arrowStore):
+			return
+		badgerIndices, arrowIndices = geometry.overlapPairs(
+			self.badgerStore.boxes(), self.arrowStore.boxes())
+		hits = []
+		usedBadgers = set()
+		usedArrows = set()
+		for badgerIndex, arrowIndex in zip(badgerIndices.tolist(),
+			arrowIndices.tolist()):
+			if badgerIndex in usedBadgers or arrowIndex in usedArrows:
+				continue
+			usedBadgers.add(badgerIndex)
+			usedArrows.add(arrowIndex)
+			hits.append((self.badgerStore.owners[badgerIndex],
+				self.arrowStore.owners[arrowIndex]))
+		for badger, arrow in hits:
+			self.hitBadger(badger, arrow)
+
+	def collideBadgers(self):
+		"""Resolves arrow hits using the spatial hash broadphase."""
+
+		self.arrowGrid.clear()
+		for arrow in self.arrowList:
+			self.arrowGrid.insert(arrow, arrow.get_rect())
+
 		for badger in self.badgerList:
 			badrect = badger.get_rect()
-			for arrow in self.arrowList:
-				arrowrect = arrow.get_rect()
+			for arrow, arrowrect in self.arrowGrid.query(badrect):
 				if badrect.colliderect(arrowrect):
-					self.badgerList.remove(badger)
-					self.arrowList.remove(arrow)
-					self.kills += 1
-					self.enemySound.play()
+					self.arrowGrid.remove(arrow)
+					self.hitBadger(badger, arrow)
 					break
 
-		for badger in self.badgerList:
-			badger.move(point.Point(-badger.speed, 0))
-			if badger.pos.x <= self.castleImage.get_width() + 20:
-				self.badgerList.remove(badger)
-				self.castleHealth -= random.randint(self.badMinDmg, self.badMaxDmg)
-				self.hitSound.play()
-
 	def badgerTimer(self):
 		"""Handles the badger timer. Periodically increases the timer for badger
 		spawning."""
@@ -437,34 +882,211 @@ class Game():
 		self.nextBadgerTimer += 1
 
 		if self.nextBadgerTimer == self.badgerBaseTime:
-			self.badgerList.append(Badger(point.Point(self.screen.get_width(), random.randint(50, 430))))
+			self.badgerList.append(self.badgerPool.acquire(point.Point(self.screen.get_width(), self.rng.randint(50, 430)), self.badgerStore, self.ticks))
 			self.nextBadgerTimer = 0
 			if self.badgerBaseTime >= 60:
 				self.badgerBaseTime -= 2
 			elif self.badgerBaseTime >= 20:
 				self.badgerBaseTime -= 1
 
+	def elapsed(self):
+		"""Returns game time in milliseconds, derived from the number of
+		ticks."""
+
+		return self.ticks * 1000 // self.tickRate
+
+	def savePositions(self):
+		"""Remembers positions of the moving entities before a tick."""
+
+		if self.arrowStore is not None:
+			self.arrowStore.savePositions()
+		else:
+			for arrow in self.arrowList:
+				arrow.prevPos = (arrow.pos.x, arrow.pos.y)
+		if self.badgerStore is not None:
+			self.badgerStore.savePositions()
+		else:
+			for badger in self.badgerList:
+				badger.prevPos = (badger.pos.x, badger.pos.y)
+		self.player.prevPos = (self.player.pos.x, self.player.pos.y)
+
+	def checksum(self):
+		"""Returns a CRC-32 of the simulation state.
+
+		Two runs of the game with the same seed and input have the same
+		checksum after the same number of ticks.
+		"""
+
+		state = [struct.pack("<iiiiiidd", self.ticks, self.kills,
+			self.castleHealth, self.shotArrows, self.nextBadgerTimer,
+			self.badgerBaseTime, self.player.pos.x, self.player.pos.y)]
+		for arrow in self.arrowList:
+			state.append(struct.pack("<ddd", arrow.pos.x, arrow.pos.y,
+				arrow.angle))
+		for badger in self.badgerList:
+			state.append(struct.pack("<dd", badger.pos.x, badger.pos.y))
+		return zlib.crc32(b"".join(state))
+
+	def snapshot(self):
+		"""Returns the simulation state packed into bytes.
+
+		The snapshot holds no surfaces or other presentation state, only
+		what the simulation needs to continue, and can be restored by
+		restore() in any game.
+		"""
+
+		player = self.player
+		keys = sum(1 << bit for bit, key in enumerate(_SNAPSHOT_KEYS)
+			if self.keys[key])
+		parts = [_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+			self.ticks, self.kills, self.castleHealth, self.shotArrows,
+			self.nextBadgerTimer, self.badgerBaseTime, self.wintime,
+			self.badMinDmg, self.badMaxDmg, self.running,
+			-1 if self.win is None else self.win, keys,
+			player.pos.x, player.pos.y, player.prevPos[0], player.prevPos[1],
+			len(self.arrowList), len(self.badgerList))]
+		version, internal, gauss = self.rng.getstate()
+		parts.append(_SNAPSHOT_RANDOM.pack(version, *internal,
+			gauss is not None, 0.0 if gauss is None else gauss))
+		for arrow in self.arrowList:
+			prevX, prevY = previousPos(arrow)
+			parts.append(_SNAPSHOT_ARROW.pack(arrow.pos.x, arrow.pos.y,
+				arrow.angle, prevX, prevY))
+		for badger in self.badgerList:
+			prevX, prevY = previousPos(badger)
+			parts.append(_SNAPSHOT_BADGER.pack(badger.pos.x, badger.pos.y,
+				badger.spawnTick, prevX, prevY))
+		return b"".join(parts)
+
+	def restore(self, data):
+		"""Replaces the simulation state with a snapshot.
+
+		Args:
+			data (bytes): Snapshot returned by snapshot().
+
+		Raises:
+			ValueError: The data is not a snapshot of this version.
+		"""
+
+		header = _SNAPSHOT_HEADER.unpack_from(data)
+		if header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_VERSION:
+			raise ValueError("not a game snapshot of version {}".format(
+				SNAPSHOT_VERSION))
+		(self.ticks, self.kills, self.castleHealth, self.shotArrows,
+			self.nextBadgerTimer, self.badgerBaseTime, self.wintime,
+			self.badMinDmg, self.badMaxDmg) = header[2:11]
+		running, win, keys = header[11:14]
+		self.running = bool(running)
+		self.win = None if win < 0 else bool(win)
+		for bit, key in enumerate(_SNAPSHOT_KEYS):
+			self.keys[key] = bool(keys & 1 << bit)
+		self.player.pos.move_to(header[14], header[15])
+		self.player.prevPos = header[16:18]
+		arrows, badgers = header[18:20]
+		offset = _SNAPSHOT_HEADER.size
+
+		state = _SNAPSHOT_RANDOM.unpack_from(data, offset)
+		self.rng.setstate((state[0], state[1:626],
+			state[627] if state[626] else None))
+		offset += _SNAPSHOT_RANDOM.size
+
+		for arrow in list(self.arrowList):
+			self.removeArrow(arrow)
+		for badger in list(self.badgerList):
+			self.removeBadger(badger)
+		end = offset + arrows * _SNAPSHOT_ARROW.size
+		for x, y, angle, prevX, prevY in _SNAPSHOT_ARROW.iter_unpack(
+			data[offset:end]):
+			arrow = self.arrowPool.acquire(point.Point(x, y), -angle,
+				self.arrowStore)
+			setPreviousPos(arrow, (prevX, prevY))
+			self.arrowList.append(arrow)
+		offset = end
+		end = offset + badgers * _SNAPSHOT_BADGER.size
+		for x, y, spawnTick, prevX, prevY in _SNAPSHOT_BADGER.iter_unpack(
+			data[offset:end]):
+			badger = self.badgerPool.acquire(point.Point(x, y),
+				self.badgerStore, spawnTick)
+			setPreviousPos(badger, (prevX, prevY))
+			self.badgerList.append(badger)
+		if self.renderer is not None:
+			self.renderer.invalidate()
+
 	def checkEndGame(self):
 		"""Ends the game when the conditions are met."""
 
-		if pygame.time.get_ticks() >= self.wintime:
+		if self.elapsed() >= self.wintime:
 			self.running = False
 			self.win = True
 		elif self.castleHealth <= 0:
 			self.running = False
 			self.win = False
 
+	def measure(self, name, func, *args):
+		"""Calls a game loop phase, timing it when profiling.
+
+		Args:
+			name (str): Name of the phase.
+			func (callable): The phase to call.
+			*args: Arguments passed to the phase.
+		"""
+
+		if self.profiler is None:
+			return func(*args)
+		return self.profiler.measure(name, func, *args)
+
+	def update(self):
+		"""Advances the game simulation by one tick."""
+
+		if not self.headless:
+			self.savePositions()
+		self.measure("handleEvents", self.handleEvents)
+		self.measure("movePlayer", self.movePlayer, self.player)
+		self.measure("handleArrows", self.handleArrows)
+		self.measure("handleBadgers", self.handleBadgers)
+		self.measure("badgerTimer", self.badgerTimer)
+		self.ticks += 1
+		self.checkEndGame()
+
+	def renderFrame(self, alpha):
+		"""Draws a frame and closes it in the profiler.
+
+		Args:
+			alpha (float): How far between the previous and the
+				current tick to draw the moving entities.
+		"""
+
+		self.measure("redrawScreen", self.redrawScreen, alpha)
+		if self.profiler is not None:
+			self.profiler.endFrame()
+
+	def runHeadless(self):
+		"""Runs the simulation without rendering as fast as possible.
+
+		Returns:
+			bool: True if the game was won, False if it was lost and
+				None if the player quit.
+		"""
+
+		while self.running:
+			self.update()
+			if self.profiler is not None:
+				self.profiler.endFrame()
+		return self.win
+
 	def run(self):
 		"""Main game method. Call it to run the game."""
 
-		while self.running:
-			self.redrawScreen()
-			self.handleEvents()
-			self.movePlayer(self.player)
-			self.handleArrows()
-			self.handleBadgers()
-			self.badgerTimer()
-			self.checkEndGame()
+		if self.headless:
+			return self.runHeadless()
+
+		loop = gameloop.FixedStepLoop(self.update, self.renderFrame,
+			self.tickRate, maxFps=self.maxFps)
+		loop.run(lambda: self.running)
+		if self.quitRequested:
+			self.music.stop()
+			pygame.quit()
+			return
 
 		if self.kills < 1:
 			accuracy = "{:.2f}".format(0)
@@ -475,21 +1097,127 @@ class Game():
 		textrect.centerx = self.screen.get_rect().centerx
 		textrect.centery = self.screen.get_rect().centery + 24
 		if self.win == True:
-			self.screen.blit(self.youWinImage, (0,0))
+			self.screen.blit(assetManager.image("resources/images/youwin.png"), (0,0))
 		else:
-			self.screen.blit(self.gameOverImage, (0,0))
+			self.screen.blit(assetManager.image("resources/images/gameover.png"), (0,0))
 		self.screen.blit(text, textrect)
 
+		clock = pygame.time.Clock()
 		while True:
 			pygame.display.flip()
+			clock.tick(30)
 			for event in pygame.event.get():
 				if (event.type == pygame.QUIT or
 					event.type == pygame.KEYDOWN or
 					event.type == pygame.MOUSEBUTTONDOWN):
+					self.music.stop()
 					pygame.quit()
 					exit(0)
 
+def positiveInt(text):
+	"""Parses a command line argument which must be a positive integer."""
+
+	try:
+		value = int(text)
+	except ValueError:
+		raise argparse.ArgumentTypeError("{} is not an integer".format(text))
+	if value <= 0:
+		raise argparse.ArgumentTypeError("{} is not positive".format(value))
+	return value
+
 if __name__ == "__main__":
-	game = Game()
-	game.run()
+	parser = argparse.ArgumentParser(description="Bunny the Defender")
+	parser.add_argument("--headless", action="store_true",
+		help="run the simulation without display, audio and input")
+	parser.add_argument("--entity-store", action="store_true",
+		help="keep arrows and badgers in NumPy arrays")
+	parser.add_argument("--tick-rate", type=positiveInt, default=60,
+		help="simulation ticks per second, speeds and timers are counted "
+			"in ticks so it also sets the game speed (default: 60)")
+	parser.add_argument("--seed", type=int,
+		help="seed the simulation to make runs with the same input repeat")
+	parser.add_argument("--profile", action="store_true",
+		help="show frame timings on screen")
+	parser.add_argument("--profile-dump", metavar="FILE",
+		help="write frame timings to a .csv or .json file at exit")
+	parser.add_argument("--asset-report", action="store_true",
+		help="print load times and memory of the assets at exit")
+	parser.add_argument("--audio-report", action="store_true",
+		help="print how many sounds were played and dropped at exit")
+	parser.add_argument("--bot", action="store_true",
+		help="let a bot aiming at the nearest badger play")
+	parser.add_argument("--fire-interval", type=positiveInt, default=4,
+		help="ticks between shots of the bot (default: 4)")
+	parser.add_argument("--record", metavar="FILE",
+		help="record the input to FILE to replay the game later")
+	parser.add_argument("--replay", metavar="FILE",
+		help="replay input recorded to FILE, as fast as possible with "
+			"--headless")
+	parser.add_argument("--no-atlas", action="store_true",
+		help="load sprites from separate files even if an atlas exists")
+	parser.add_argument("--no-bake", action="store_true",
+		help="decode assets from their files even if a baked cache exists")
+	args = parser.parse_args()
+
+	if args.asset_report:
+		atexit.register(lambda: print("\n".join(assetManager.report())))
+
+	frameProfiler = None
+	if args.profile or args.profile_dump:
+		frameProfiler = profiler.FrameProfiler()
+		if args.profile_dump:
+			atexit.register(frameProfiler.dump, args.profile_dump)
+
+	inputSource = None
+	tickRate = args.tick_rate
+	entityStore = args.entity_store
+	seed = args.seed
+	bot = None
+	if args.bot and not args.replay:
+		bot = policy.PolicyInput(policy.AimBot(Arrow.speed,
+			args.fire_interval),
+			None if args.headless else inputsource.PygameInput())
+		inputSource = bot
+	if args.replay:
+		inputSource = inputlog.ReplayInput(args.replay,
+			None if args.headless else inputsource.PygameInput())
+		tickRate = inputSource.tickRate
+		entityStore = inputSource.entityStore
+		seed = inputSource.seed
+		atexit.register(lambda: print(
+			"Replayed {} ticks, checksums matched: {}, mismatched: {}".format(
+			inputSource.tick, inputSource.verified,
+			len(inputSource.mismatches))))
+	elif args.record:
+		if seed is None:
+			seed = random.randrange(2**31)
+		if bot is not None:
+			source = bot
+		elif args.headless:
+			source = inputsource.ScriptedInput([])
+		else:
+			source = inputsource.PygameInput()
+		inputSource = inputlog.InputRecorder(source, args.record, tickRate,
+			seed, entityStore)
+		atexit.register(inputSource.close)
+
+	game = Game(entityStore=entityStore, headless=args.headless,
+		inputSource=inputSource, tickRate=tickRate,
+		frameProfiler=frameProfiler, profileOverlay=args.profile,
+		atlasIndex=None if args.no_atlas else atlas.DEFAULT_INDEX,
+		bakedAssets=None if args.no_bake else bake.DEFAULT_PATH,
+		rng=None if seed is None else random.Random(seed))
+	if args.replay or args.record:
+		inputSource.checksum = game.checksum
+	if bot is not None:
+		bot.game = game
+	if args.audio_report:
+		atexit.register(lambda: print("\n".join(game.audio.report())))
+	if args.headless:
+		win = game.run()
+		print("{} after {} ticks, kills: {}, castle health: {}".format(
+			{True: "Won", False: "Lost", None: "Quit"}[win], game.ticks,
+			game.kills, game.castleHealth))
+	else:
+		game.run()
 
@@ -0,0 +1,46 @@
+"""Sprite animations driven by the game clock.
+
+An animation used to advance whenever its image was read, so it ran
+faster the more often a sprite was drawn or measured. FrameTable instead
+maps a tick number to a frame, which makes looking a frame up free of
+side effects and lets all entities of a kind share one table.
+
+FrameTable  -- animation frames looked up by tick
+"""
+
+class FrameTable():
+	"""Animation frames looked up by tick.
+
+	The table holds every frame repeated for the number of ticks it is
+	shown, so a lookup is a single index operation equivalent to
+	frames[(tick // frameTicks) % len(frames)].
+
+	Attributes:
+		frames (tuple): Frames of the animation, usually surfaces.
+		frameTicks (int): Number of ticks every frame is shown for.
+	"""
+
+	def __init__(self, frames, frameTicks):
+		"""Initializes a FrameTable instance.
+
+		Args:
+			frames (iterable): Frames of the animation.
+			frameTicks (int): Number of ticks every frame is shown for.
+		"""
+
+		self.frames = tuple(frames)
+		self.frameTicks = frameTicks
+		self._table = tuple(frame for frame in self.frames
+			for _ in range(frameTicks))
+
+	def frame(self, tick):
+		"""Returns the frame shown at a tick.
+
+		Args:
+			tick (int): Ticks since the animation started.
+		"""
+
+		return self._table[tick % len(self._table)]
+
+	def __len__(self):
+		return len(self._table)
@@ -0,0 +1,229 @@
+"""Central cache of images and sounds.
+
+Assets are loaded on first use and shared by everyone asking for the
+same path. Once a display exists, images are converted to its pixel
+format, which makes every later blit of them faster. When a texture
+atlas is loaded, images and rotations found in it are served from the
+atlas pages instead of separate files, and when a baked cache is
+loaded, assets found in it are taken from there without decoding. The
+manager also keeps track of how long the loading took and how much
+memory the assets occupy.
+
+AssetManager  -- lazily loaded, shared and converted assets
+"""
+
+import time
+import pygame
+from libs import rotcache
+from libs import atlas
+from libs import bake
+
+class AssetManager():
+	"""Lazily loaded, shared and converted assets.
+
+	Attributes:
+		loadTimes (dict of str:float): Seconds spent loading each path.
+		atlas (atlas.Atlas): Loaded texture atlas, None if there is none.
+		baked (bake.BakedAssets): Loaded cache of decoded assets, None if
+			there is none.
+		convertImages (bool): Whether images are converted to the
+			display pixel format. Turn it off when nothing is drawn, to
+			keep baked images in the mapped cache instead of copying
+			them.
+	"""
+
+	def __init__(self):
+		self.loadTimes = {}
+		self.atlas = None
+		self.baked = None
+		self.convertImages = True
+		self._images = {}
+		self._sounds = {}
+		self._rotations = {}
+		self._fromAtlas = set()
+
+	def image(self, path):
+		"""Returns an image, loading it on first use.
+
+		If a display exists and convertImages is on, the image is
+		converted to its pixel format.
+		Images loaded before the display was created are converted the
+		next time they are asked for, or by convertAll().
+
+		Args:
+			path (str): Path to the image file.
+
+		Returns:
+			pygame.Surface: The shared image. Do not modify it.
+		"""
+
+		entry = self._images.get(path)
+		if entry is None and self.atlas is not None and path in self.atlas:
+			entry = [self.atlas.image(path), True]
+			self._images[path] = entry
+		if entry is None:
+			start = time.perf_counter()
+			entry = [self._loadImage(path), False]
+			self.loadTimes[path] = time.perf_counter() - start
+			self._images[path] = entry
+		if (not entry[1] and self.convertImages and
+			pygame.display.get_surface() is not None):
+			self._convert(path, entry)
+		return entry[0]
+
+	def rotations(self, path, step=1, preload=True):
+		"""Returns a shared rotation cache of an image.
+
+		Args:
+			path (str): Path to the image file.
+			step (float): Angular resolution in degrees.
+			preload (bool): Whether to render all the rotations when
+				the cache is created.
+
+		Returns:
+			rotcache.RotationCache: Rotations of the image.
+		"""
+
+		key = (path, step)
+		cache = self._rotations.get(key)
+		if cache is None:
+			rendered = None
+			if self.atlas is not None:
+				rendered = self.atlas.rotations(path)
+			if rendered is not None and rendered[0] == step:
+				cache = rotcache.RotationCache(self.image(path), step,
+					preload=False)
+				cache.fill(rendered[1])
+				self._fromAtlas.add(key)
+			else:
+				cache = rotcache.RotationCache(self.image(path), step,
+					preload=preload)
+			self._rotations[key] = cache
+		return cache
+
+	def loadAtlas(self, indexPath):
+		"""Loads a texture atlas built by libs.atlas.
+
+		Load it after creating the display and before asking for any
+		image, so that the atlas pages are converted and images already
+		loaded from separate files are not kept twice.
+
+		Args:
+			indexPath (str): Path of the atlas index.
+		"""
+
+		start = time.perf_counter()
+		self.atlas = atlas.Atlas.load(indexPath, self._loadImage)
+		self._atlasPath = indexPath
+		self.loadTimes[indexPath] = time.perf_counter() - start
+
+	def loadBaked(self, path):
+		"""Maps a cache of decoded assets baked by libs.bake.
+
+		Load it before asking for any asset, including the atlas.
+
+		Args:
+			path (str): Path of the cache file.
+
+		Raises:
+			ValueError: The file is not a valid cache.
+		"""
+
+		self.baked = bake.BakedAssets(path)
+
+	def sound(self, path, volume=None):
+		"""Returns a sound, loading it on first use.
+
+		Args:
+			path (str): Path to the sound file.
+			volume (float): Volume to set when the sound is loaded.
+
+		Returns:
+			pygame.mixer.Sound: The shared sound.
+		"""
+
+		sound = self._sounds.get(path)
+		if sound is None:
+			start = time.perf_counter()
+			if self.baked is not None:
+				sound = self.baked.sound(path)
+			if sound is None:
+				sound = pygame.mixer.Sound(path)
+			self.loadTimes[path] = time.perf_counter() - start
+			if volume is not None:
+				sound.set_volume(volume)
+			self._sounds[path] = sound
+		return sound
+
+	def convertAll(self):
+		"""Converts all loaded images to the display pixel format.
+
+		Call it after creating the display. Does nothing when
+		convertImages is off.
+		"""
+
+		if not self.convertImages:
+			return
+		for path, entry in self._images.items():
+			if not entry[1]:
+				self._convert(path, entry)
+
+	def memoryUsage(self):
+		"""Returns a dict mapping asset paths to their size in bytes.
+
+		Rotation caches are included under the path of their image.
+		Images and rotations served from the atlas take no memory of
+		their own, the atlas pages are included under the index path.
+		"""
+
+		usage = {}
+		for path, entry in self._images.items():
+			surface = entry[0]
+			if surface.get_parent() is None:
+				usage[path] = _surfaceSize(surface)
+		for (path, step), cache in self._rotations.items():
+			if (path, step) not in self._fromAtlas:
+				usage[path] = usage.get(path, 0) + cache.memory
+		if self.atlas is not None:
+			usage[self._atlasPath] = sum(_surfaceSize(page)
+				for page in self.atlas.pages)
+		mixer = pygame.mixer.get_init()
+		if mixer is not None:
+			frequency, sampleFormat, channels = mixer
+			sampleSize = abs(sampleFormat) // 8 * channels
+			for path, sound in self._sounds.items():
+				usage[path] = int(sound.get_length() * frequency) * sampleSize
+		return usage
+
+	def report(self):
+		"""Returns lines describing load time and memory of every asset."""
+
+		usage = self.memoryUsage()
+		lines = []
+		for path in sorted(self.loadTimes):
+			lines.append("{:<36} {:7.2f} ms {:9.1f} KB".format(path,
+				self.loadTimes[path] * 1000, usage.get(path, 0) / 1024))
+		lines.append("{:<36} {:7.2f} ms {:9.1f} KB".format("total",
+			sum(self.loadTimes.values()) * 1000,
+			sum(usage.values()) / 1024))
+		return lines
+
+	def _loadImage(self, path):
+		if self.baked is not None:
+			surface = self.baked.image(path)
+			if surface is not None:
+				return surface
+		return pygame.image.load(path)
+
+	def _convert(self, path, entry):
+		surface = entry[0]
+		if surface.get_flags() & pygame.SRCALPHA:
+			entry[0] = surface.convert_alpha()
+		else:
+			entry[0] = surface.convert()
+		entry[1] = True
+		for key in [key for key in self._rotations if key[0] == path]:
+			del self._rotations[key]
+
+def _surfaceSize(surface):
+	return surface.get_width() * surface.get_height() * surface.get_bytesize()
@@ -0,0 +1,214 @@
+"""Texture atlas of the game sprites.
+
+Packing all sprites, including pre-rendered rotations, into a few large
+surfaces means fewer files to open at startup and better cache locality
+when blitting. The atlas is built offline into PNG pages with a JSON
+index, and loaded by the game, which then gets the sprites as
+subsurfaces of the pages.
+
+Run as 'python3 -m libs.atlas' from the game folder to build the atlas.
+
+build  -- pack images into atlas pages and write them with an index
+Atlas  -- loaded atlas serving subsurfaces of its pages
+"""
+
+import os
+import json
+import argparse
+import pygame
+
+DEFAULT_INDEX = "resources/atlas/atlas.json"
+
+# Images whose rotations are packed into the atlas, with the angular
+# resolution in degrees. Keep it in sync with the rotation caches used
+# by the game.
+DEFAULT_ROTATIONS = {
+	"resources/images/arrow.png": 1,
+	"resources/images/bunny.png": 1}
+
+def _pack(sizes, pageSize, padding):
+	"""Places rectangles on pages using simple shelf packing.
+
+	Args:
+		sizes (list of tuple): Widths and heights to place.
+		pageSize (int): Width and maximum height of a page.
+		padding (int): Empty pixels around every rectangle.
+
+	Returns:
+		tuple: List of (page, x, y) in the order of 'sizes' and a list
+			of page heights.
+	"""
+
+	order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+	places = [None] * len(sizes)
+	heights = [0]
+	x = y = shelfHeight = 0
+	for i in order:
+		width = sizes[i][0] + padding
+		height = sizes[i][1] + padding
+		if width > pageSize or height > pageSize:
+			raise ValueError("sprite {}x{} does not fit on a page".format(*sizes[i]))
+		if x + width > pageSize:
+			x = 0
+			y += shelfHeight
+			shelfHeight = 0
+		if y + height > pageSize:
+			heights.append(0)
+			x = y = shelfHeight = 0
+		places[i] = (len(heights) - 1, x, y)
+		x += width
+		shelfHeight = max(shelfHeight, height)
+		heights[-1] = max(heights[-1], y + height)
+	return places, heights
+
+def build(paths, indexPath=DEFAULT_INDEX, rotations=DEFAULT_ROTATIONS,
+	pageSize=2048, padding=1):
+	"""Packs images into atlas pages and writes them with an index.
+
+	Args:
+		paths (list of str): Paths of the images to pack.
+		indexPath (str): Where to write the JSON index. Pages are
+			written next to it.
+		rotations (dict of str:float): Images to pack rotated, mapped
+			to the angular resolution in degrees.
+		pageSize (int): Width and maximum height of a page.
+		padding (int): Empty pixels between sprites.
+
+	Returns:
+		dict: The written index.
+	"""
+
+	entries = []
+	for path in paths:
+		entries.append((path, None, pygame.image.load(path)))
+	for path, step in rotations.items():
+		image = pygame.image.load(path)
+		for bucket in range(int(round(360 / step))):
+			entries.append((path, bucket,
+				pygame.transform.rotate(image, bucket * step)))
+
+	places, heights = _pack([entry[2].get_size() for entry in entries],
+		pageSize, padding)
+	pages = [pygame.Surface((pageSize, height), pygame.SRCALPHA)
+		for height in heights]
+	index = {"pages": [], "sprites": {}, "rotations": {}}
+	for path, step in rotations.items():
+		index["rotations"][path] = {"step": step, "frames": []}
+	for (path, bucket, image), (page, x, y) in zip(entries, places):
+		pages[page].blit(image, (x, y))
+		place = [page, x, y, image.get_width(), image.get_height()]
+		if bucket is None:
+			index["sprites"][path] = place
+		else:
+			index["rotations"][path]["frames"].append(place)
+
+	directory = os.path.dirname(indexPath)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	base = os.path.splitext(os.path.basename(indexPath))[0]
+	for number, page in enumerate(pages):
+		name = "{}{}.png".format(base, number)
+		pygame.image.save(page, os.path.join(directory, name))
+		index["pages"].append(name)
+	with open(indexPath, "w") as output:
+		json.dump(index, output)
+	return index
+
+class Atlas():
+	"""Loaded atlas serving subsurfaces of its pages.
+
+	Attributes:
+		pages (list of pygame.Surface): The atlas pages.
+	"""
+
+	def __init__(self, pages, index):
+		"""Initializes an Atlas instance.
+
+		Args:
+			pages (list of pygame.Surface): The atlas pages.
+			index (dict): Index as written by build().
+		"""
+
+		self.pages = pages
+		self._sprites = index["sprites"]
+		self._rotations = index["rotations"]
+		self._cache = {}
+
+	@classmethod
+	def load(cls, indexPath, loadImage=pygame.image.load):
+		"""Loads an atlas written by build().
+
+		Pages are converted to the display pixel format if a display
+		exists.
+
+		Args:
+			indexPath (str): Path of the JSON index.
+			loadImage (callable): Loads a page from its path.
+
+		Returns:
+			Atlas: The loaded atlas.
+		"""
+
+		with open(indexPath) as source:
+			index = json.load(source)
+		directory = os.path.dirname(indexPath)
+		pages = []
+		for name in index["pages"]:
+			page = loadImage(os.path.join(directory, name))
+			if pygame.display.get_surface() is not None:
+				page = page.convert_alpha()
+			pages.append(page)
+		return cls(pages, index)
+
+	def image(self, path):
+		"""Returns the sprite of an image path as a subsurface.
+
+		Raises:
+			KeyError: The image is not in the atlas.
+		"""
+
+		surface = self._cache.get(path)
+		if surface is None:
+			surface = self._subsurface(self._sprites[path])
+			self._cache[path] = surface
+		return surface
+
+	def rotations(self, path):
+		"""Returns the pre-rendered rotations of an image.
+
+		Returns:
+			tuple: The angular resolution in degrees and the list of
+				rotated sprites, or None if the atlas has no rotations
+				of the image.
+		"""
+
+		entry = self._rotations.get(path)
+		if entry is None:
+			return None
+		return entry["step"], [self._subsurface(place)
+			for place in entry["frames"]]
+
+	def _subsurface(self, place):
+		page, x, y, width, height = place
+		return self.pages[page].subsurface(pygame.Rect(x, y, width, height))
+
+	def __contains__(self, path):
+		return path in self._sprites
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Build the texture atlas of the game sprites")
+	parser.add_argument("--output", default=DEFAULT_INDEX,
+		help="path of the JSON index (default: %(default)s)")
+	parser.add_argument("--page-size", type=int, default=2048,
+		help="width and maximum height of a page (default: 2048)")
+	args = parser.parse_args()
+
+	images = sorted(os.path.join("resources/images", name)
+		for name in os.listdir("resources/images")
+		if name.endswith(".png") and not name.startswith("."))
+	index = build(images, args.output, pageSize=args.page_size)
+	print("Packed {} images and {} rotations into {} page(s)".format(
+		len(index["sprites"]),
+		sum(len(entry["frames"]) for entry in index["rotations"].values()),
+		len(index["pages"])))
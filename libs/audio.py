@@ -0,0 +1,122 @@
+"""Sound effects played through reserved channel groups.
+
+Playing every sound effect the moment its event happens exhausts the
+mixer channels during heavy waves, and most of the overlapping copies
+cannot be told apart anyway. AudioManager gives every category of sound
+its own group of reserved channels, merges plays of a category coming
+in quick succession into one and drops plays when all the voices of the
+category are busy, counting what it dropped.
+
+AudioManager  -- plays sounds in categories with bounded voices
+"""
+
+import time
+import pygame
+
+class Category():
+	"""A group of channels shared by sounds of one kind.
+
+	Attributes:
+		name (str): Name of the category.
+		channels (list of pygame.mixer.Channel): Channels reserved for
+			the category.
+		window (float): Plays closer than this many seconds after the
+			last one are coalesced into it.
+		played (int): Number of sounds played.
+		coalesced (int): Number of plays merged into a previous one.
+		dropped (int): Number of plays dropped because all the channels
+			were busy.
+		lastPlay (float): Time the last sound started, None before the
+			first one.
+	"""
+
+	def __init__(self, name, channels, window):
+		self.name = name
+		self.channels = channels
+		self.window = window
+		self.played = 0
+		self.coalesced = 0
+		self.dropped = 0
+		self.lastPlay = None
+
+class AudioManager():
+	"""Plays sounds in categories with bounded voices.
+
+	When the mixer is not initialized, the manager is disabled and
+	ignores all plays.
+
+	Attributes:
+		categories (dict of str:Category): Registered categories.
+		enabled (bool): Whether sounds are played at all.
+	"""
+
+	def __init__(self, clock=time.perf_counter):
+		"""Initializes an AudioManager instance.
+
+		Args:
+			clock (callable): Returns the current time in seconds.
+		"""
+
+		self.categories = {}
+		self.enabled = pygame.mixer.get_init() is not None
+		self._clock = clock
+		self._reserved = 0
+
+	def addCategory(self, name, voices, window=0.05):
+		"""Reserves a group of channels for a category of sounds.
+
+		Args:
+			name (str): Name of the category.
+			voices (int): Maximum number of its sounds playing at once.
+			window (float): Plays closer than this many seconds after
+				the last one are coalesced into it.
+		"""
+
+		channels = []
+		if self.enabled:
+			first = self._reserved
+			self._reserved += voices
+			if pygame.mixer.get_num_channels() < self._reserved:
+				pygame.mixer.set_num_channels(self._reserved)
+			pygame.mixer.set_reserved(self._reserved)
+			channels = [pygame.mixer.Channel(i)
+				for i in range(first, self._reserved)]
+		self.categories[name] = Category(name, channels, window)
+
+	def play(self, name, sound):
+		"""Plays a sound in a category, unless it is throttled.
+
+		Args:
+			name (str): Name of the category.
+			sound (pygame.mixer.Sound): Sound to play.
+
+		Returns:
+			bool: Whether the sound started playing.
+		"""
+
+		if not self.enabled:
+			return False
+		category = self.categories[name]
+		now = self._clock()
+		if (category.lastPlay is not None and
+			now - category.lastPlay < category.window):
+			category.coalesced += 1
+			return False
+		for channel in category.channels:
+			if not channel.get_busy():
+				channel.play(sound)
+				category.lastPlay = now
+				category.played += 1
+				return True
+		category.dropped += 1
+		return False
+
+	def report(self):
+		"""Returns lines with play statistics of every category."""
+
+		lines = ["{:<10} {:>7} {:>9} {:>7}".format("category", "played",
+			"coalesced", "dropped")]
+		for category in self.categories.values():
+			lines.append("{:<10} {:>7} {:>9} {:>7}".format(category.name,
+				category.played, category.coalesced, category.dropped))
+		return lines
@@ -0,0 +1,85 @@
+"""Pre-composited static background.
+
+Parts of the scene which never move, like grass and castles, are drawn
+once into cached layers and composed into a single surface. The work is
+repeated only when a layer is invalidated or the background is resized.
+
+LayeredBackground  -- static layers composed into one cached surface
+"""
+
+import pygame
+
+class LayeredBackground():
+	"""Static layers composed into one cached surface.
+
+	Every layer is a function drawing onto a transparent surface. Layers
+	are composed bottom to top in the order they were added.
+
+	Attributes:
+		size (tuple of int): Width and height of the background.
+	"""
+
+	def __init__(self, size):
+		"""Initializes a LayeredBackground instance.
+
+		Args:
+			size (tuple of int): Width and height of the background.
+		"""
+
+		self.size = size
+		self._layers = []
+		self._surface = None
+
+	def addLayer(self, name, draw):
+		"""Adds a layer on top of the existing ones.
+
+		Args:
+			name (str): Name used to invalidate the layer.
+			draw (callable): Draws the layer. Gets a pygame.Surface
+				of the background size.
+		"""
+
+		self._layers.append([name, draw, None])
+		self._surface = None
+
+	def invalidate(self, name=None):
+		"""Marks a layer to be redrawn next time the surface is used.
+
+		Args:
+			name (str): Name of the layer, None for all layers.
+		"""
+
+		for layer in self._layers:
+			if name is None or layer[0] == name:
+				layer[2] = None
+		self._surface = None
+
+	def resize(self, size):
+		"""Changes the size of the background and redraws all layers."""
+
+		self.size = size
+		self.invalidate()
+
+	@property
+	def dirty(self):
+		"""True if the surface has to be composed again."""
+
+		return self._surface is None
+
+	@property
+	def surface(self):
+		"""The composed background as a pygame.Surface."""
+
+		if self._surface is None:
+			self._compose()
+		return self._surface
+
+	def _compose(self):
+		surface = pygame.Surface(self.size)
+		for layer in self._layers:
+			if layer[2] is None:
+				image = pygame.Surface(self.size, pygame.SRCALPHA)
+				layer[1](image)
+				layer[2] = image
+			surface.blit(layer[2], (0, 0))
+		self._surface = surface
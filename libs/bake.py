@@ -0,0 +1,201 @@
+"""Binary cache of decoded assets.
+
+Decoding PNG and WAV files takes a noticeable part of the startup, which
+matters when many short-lived headless games are launched. Baking decodes
+the assets once and writes the raw pixels and samples into a single file.
+The game then maps the file into memory and creates surfaces directly on
+top of it, without decoding or copying.
+
+Every asset is stored with the size, modification time and hash of its
+source file. When the size or time of a source differs from the baked
+one, its hash is compared, and assets whose source has changed since
+baking are not served from the cache. A stale cache only costs speed,
+never correctness, and an unchanged one costs a stat() per asset.
+
+Run as 'python3 -m libs.bake' from the game folder to bake the assets.
+
+File layout: magic, format version and index length packed as "<8sII",
+the JSON index, then the data blocks aligned to 16 bytes. Offsets in the
+index are relative to the start of the data.
+
+bake  -- decode assets and write them into a cache file
+BakedAssets  -- memory-mapped cache serving surfaces and sounds
+"""
+
+import os
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+import pygame
+
+DEFAULT_PATH = "resources/cache/assets.bin"
+
+_MAGIC = b"BUNNYBAK"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_ALIGN = 16
+
+def fileHash(path):
+	"""Returns the SHA-1 hex digest of a file's content."""
+
+	with open(path, "rb") as source:
+		return hashlib.sha1(source.read()).hexdigest()
+
+def _sourceInfo(path):
+	stat = os.stat(path)
+	return {"hash": fileHash(path), "sourceSize": stat.st_size,
+		"sourceTime": stat.st_mtime_ns}
+
+def _aligned(size):
+	return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def bake(imagePaths, soundPaths, outputPath=DEFAULT_PATH):
+	"""Decodes assets and writes them into a cache file.
+
+	Sounds are stored in the sample format of the mixer, which must be
+	initialized with the same settings as in the game.
+
+	Args:
+		imagePaths (list of str): Paths of the images to bake.
+		soundPaths (list of str): Paths of the sounds to bake.
+		outputPath (str): Path of the cache file.
+
+	Returns:
+		dict: The written index.
+	"""
+
+	index = {"images": {}, "sounds": {}}
+	blocks = []
+	offset = 0
+	for path in imagePaths:
+		surface = pygame.image.load(path)
+		mode = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+		data = pygame.image.tostring(surface, mode)
+		index["images"][path] = dict(_sourceInfo(path), offset=offset,
+			size=len(data), width=surface.get_width(),
+			height=surface.get_height(), mode=mode)
+		blocks.append(data)
+		offset += _aligned(len(data))
+	if soundPaths:
+		index["mixer"] = list(pygame.mixer.get_init())
+	for path in soundPaths:
+		data = pygame.mixer.Sound(path).get_raw()
+		index["sounds"][path] = dict(_sourceInfo(path), offset=offset,
+			size=len(data))
+		blocks.append(data)
+		offset += _aligned(len(data))
+
+	indexData = json.dumps(index).encode("utf-8")
+	directory = os.path.dirname(outputPath)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	with open(outputPath, "wb") as output:
+		output.write(_HEADER.pack(_MAGIC, _VERSION, len(indexData)))
+		output.write(indexData)
+		output.write(bytes(_aligned(output.tell()) - output.tell()))
+		for data in blocks:
+			output.write(data)
+			output.write(bytes(_aligned(len(data)) - len(data)))
+	return index
+
+class BakedAssets():
+	"""Memory-mapped cache serving surfaces and sounds.
+
+	Surfaces returned by image() share memory with the mapped file, they
+	must not be modified. Sounds are copied by the mixer.
+	"""
+
+	def __init__(self, path):
+		"""Maps a cache file written by bake().
+
+		Args:
+			path (str): Path of the cache file.
+
+		Raises:
+			ValueError: The file is not a cache of this version.
+		"""
+
+		with open(path, "rb") as source:
+			self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, indexSize = _HEADER.unpack_from(self._map)
+		if magic != _MAGIC or version != _VERSION:
+			raise ValueError("{} is not an asset cache of version {}".format(
+				path, _VERSION))
+		start = _HEADER.size
+		self._index = json.loads(self._map[start:start + indexSize])
+		self._data = memoryview(self._map)[_aligned(start + indexSize):]
+		self._fresh = {}
+
+	def image(self, path):
+		"""Returns a surface of a baked image.
+
+		Returns:
+			pygame.Surface: The image, None if it is not baked or its
+				source has changed since baking.
+		"""
+
+		entry = self._index["images"].get(path)
+		if entry is None or not self._isFresh(path, entry):
+			return None
+		return pygame.image.frombuffer(self._block(entry),
+			(entry["width"], entry["height"]), entry["mode"])
+
+	def sound(self, path):
+		"""Returns a baked sound.
+
+		Returns:
+			pygame.mixer.Sound: The sound, None if it is not baked, its
+				source has changed since baking or the mixer settings
+				differ from the ones used for baking.
+		"""
+
+		entry = self._index["sounds"].get(path)
+		if (entry is None or not self._isFresh(path, entry) or
+			list(pygame.mixer.get_init() or ()) != self._index.get("mixer")):
+			return None
+		return pygame.mixer.Sound(buffer=self._block(entry))
+
+	def __contains__(self, path):
+		return path in self._index["images"] or path in self._index["sounds"]
+
+	def _block(self, entry):
+		return self._data[entry["offset"]:entry["offset"] + entry["size"]]
+
+	def _isFresh(self, path, entry):
+		fresh = self._fresh.get(path)
+		if fresh is None:
+			try:
+				stat = os.stat(path)
+			except FileNotFoundError:
+				fresh = True
+			else:
+				fresh = ((stat.st_size == entry.get("sourceSize") and
+					stat.st_mtime_ns == entry.get("sourceTime")) or
+					fileHash(path) == entry["hash"])
+			self._fresh[path] = fresh
+		return fresh
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Decode the game assets into a binary cache")
+	parser.add_argument("--output", default=DEFAULT_PATH,
+		help="path of the cache file (default: %(default)s)")
+	args = parser.parse_args()
+
+	def listFiles(directory, extension):
+		if not os.path.isdir(directory):
+			return []
+		return sorted(os.path.join(directory, name)
+			for name in os.listdir(directory)
+			if name.endswith(extension) and not name.startswith("."))
+
+	pygame.mixer.init()
+	images = listFiles("resources/images", ".png") + \
+		listFiles("resources/atlas", ".png")
+	sounds = listFiles("resources/audio", ".wav")
+	bake(images, sounds, args.output)
+	print("Baked {} images and {} sounds into {} ({:.1f} KB)".format(
+		len(images), len(sounds), args.output,
+		os.path.getsize(args.output) / 1024))
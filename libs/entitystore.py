@@ -0,0 +1,262 @@
+"""Structure-of-arrays storage for moving entities.
+
+Updating thousands of projectiles one Python object at a time is slow.
+EntityStore keeps positions, angles and speeds of all entities of a kind
+in contiguous NumPy arrays and moves them all at once. The entity objects
+stay around as thin views, their 'pos' attribute is a StorePoint reading
+and writing the arrays.
+
+NumPy is optional. Without it, creating an EntityStore raises ImportError
+and the game keeps updating entities one by one.
+
+EntityStore  -- arrays of entity state with vectorized updates
+StorePoint  -- point.Point view of a position held in a store
+"""
+
+from libs import point
+from libs import geometry
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+class EntityStore():
+	"""Arrays of entity state with vectorized updates.
+
+	Entities are kept densely packed. Removing an entity moves the last
+	one into its slot, so indices are not stable, but the owners are
+	notified through their StorePoint.
+
+	Attributes:
+		x (numpy.ndarray): Horizontal positions.
+		y (numpy.ndarray): Vertical positions.
+		angle (numpy.ndarray): Angles of movement in radians.
+		speed (numpy.ndarray): Speeds in pixels per tick.
+		width (numpy.ndarray): Widths of the entity images.
+		height (numpy.ndarray): Heights of the entity images.
+		prevX (numpy.ndarray): Horizontal positions at the start of the
+			last tick, saved by savePositions().
+		prevY (numpy.ndarray): Vertical positions at the start of the
+			last tick.
+		owners (list): Entity objects owning the slots, in slot order.
+	"""
+
+	def __init__(self, capacity=256):
+		"""Initializes an EntityStore instance.
+
+		Args:
+			capacity (int): Initial number of slots. The store grows
+				as needed.
+
+		Raises:
+			ImportError: NumPy is not installed.
+		"""
+
+		if numpy is None:
+			raise ImportError("EntityStore requires numpy")
+		self.x = numpy.zeros(capacity)
+		self.y = numpy.zeros(capacity)
+		self.angle = numpy.zeros(capacity)
+		self.speed = numpy.zeros(capacity)
+		self.width = numpy.zeros(capacity)
+		self.height = numpy.zeros(capacity)
+		self.prevX = numpy.zeros(capacity)
+		self.prevY = numpy.zeros(capacity)
+		self._vx = numpy.zeros(capacity)
+		self._vy = numpy.zeros(capacity)
+		self.owners = []
+
+	def add(self, owner, x, y, angle, speed, width=0, height=0):
+		"""Adds an entity to the store.
+
+		Args:
+			owner: Entity object the slot belongs to.
+			x (float): Horizontal position.
+			y (float): Vertical position.
+			angle (float): Angle of movement in radians.
+			speed (float): Speed in pixels per tick.
+			width (int): Width of the entity image.
+			height (int): Height of the entity image.
+
+		Returns:
+			StorePoint: View of the entity position.
+		"""
+
+		index = len(self.owners)
+		if index == len(self.x):
+			self._grow()
+		self.x[index] = x
+		self.y[index] = y
+		self.angle[index] = angle
+		self.speed[index] = speed
+		self.width[index] = width
+		self.height[index] = height
+		self.prevX[index] = x
+		self.prevY[index] = y
+		self._vx[index] = speed * numpy.cos(angle)
+		self._vy[index] = speed * numpy.sin(angle)
+		self.owners.append(owner)
+		return StorePoint(self, index)
+
+	def remove(self, index):
+		"""Removes the entity in a slot by moving the last one into it.
+
+		Args:
+			index (int): Slot of the entity.
+		"""
+
+		last = len(self.owners) - 1
+		removed = self.owners[index]
+		removed.pos.detach()
+		if index != last:
+			for column in (self.x, self.y, self.angle, self.speed,
+				self.width, self.height, self.prevX, self.prevY,
+				self._vx, self._vy):
+				column[index] = column[last]
+			moved = self.owners[last]
+			self.owners[index] = moved
+			moved.pos.index = index
+		self.owners.pop()
+
+	def savePositions(self):
+		"""Copies the positions of all entities to prevX and prevY."""
+
+		n = len(self.owners)
+		self.prevX[:n] = self.x[:n]
+		self.prevY[:n] = self.y[:n]
+
+	def integrate(self):
+		"""Moves every entity by its speed in the direction of its angle."""
+
+		n = len(self.owners)
+		self.x[:n] += self._vx[:n]
+		self.y[:n] += self._vy[:n]
+
+	def outside(self, rect):
+		"""Returns slots of entities positioned outside a rectangle.
+
+		Args:
+			rect (pygame.Rect): Rectangle to test against.
+
+		Returns:
+			list of int: Slots in descending order, so that they can be
+				removed one by one without invalidating the rest.
+		"""
+
+		box = (rect.left, rect.top, rect.right, rect.bottom)
+		mask = ~geometry.insideMask(box, self.points())
+		return numpy.flatnonzero(mask)[::-1].tolist()
+
+	def reached(self, limit):
+		"""Returns slots of entities at or left of a vertical line.
+
+		Args:
+			limit (float): Horizontal coordinate of the line.
+
+		Returns:
+			list of int: Slots in descending order.
+		"""
+
+		n = len(self.owners)
+		return numpy.flatnonzero(self.x[:n] <= limit)[::-1].tolist()
+
+	def points(self):
+		"""Returns positions of all entities as an array of shape (n, 2)."""
+
+		n = len(self.owners)
+		return numpy.column_stack((self.x[:n], self.y[:n]))
+
+	def boxes(self):
+		"""Returns bounding boxes of all entities centered on their
+		positions, as an array of shape (n, 4) for libs.geometry."""
+
+		n = len(self.owners)
+		halfWidth = self.width[:n] / 2
+		halfHeight = self.height[:n] / 2
+		return numpy.column_stack((
+			self.x[:n] - halfWidth, self.y[:n] - halfHeight,
+			self.x[:n] + halfWidth, self.y[:n] + halfHeight))
+
+	def _grow(self):
+		old = len(self.x)
+		for name in ("x", "y", "angle", "speed", "width", "height",
+			"prevX", "prevY", "_vx", "_vy"):
+			column = numpy.zeros(old * 2)
+			column[:old] = getattr(self, name)
+			setattr(self, name, column)
+
+	def __len__(self):
+		return len(self.owners)
+
+class StorePoint(point.Point):
+	"""A point.Point whose coordinates live in an EntityStore.
+
+	Once the entity is removed from the store, the point keeps its last
+	coordinates as a regular point.
+
+	Attributes:
+		store (EntityStore): Store holding the coordinates, None after
+			removal.
+		index (int): Slot of the entity in the store.
+	"""
+
+	def __init__(self, store, index):
+		self.store = store
+		self.index = index
+
+	def detach(self):
+		"""Copies the coordinates out of the store and releases it."""
+
+		x, y = self.x, self.y
+		self._prevPos = self.prevPos
+		self.store = None
+		self._x = x
+		self._y = y
+
+	@property
+	def x(self):
+		if self.store is None:
+			return self._x
+		return float(self.store.x[self.index])
+
+	@x.setter
+	def x(self, value):
+		if self.store is None:
+			self._x = value
+		else:
+			self.store.x[self.index] = value
+
+	@property
+	def y(self):
+		if self.store is None:
+			return self._y
+		return float(self.store.y[self.index])
+
+	@y.setter
+	def y(self, value):
+		if self.store is None:
+			self._y = value
+		else:
+			self.store.y[self.index] = value
+
+	@property
+	def prevPos(self):
+		"""Position at the start of the last tick as a tuple (x, y)."""
+
+		if self.store is None:
+			return self._prevPos
+		return (float(self.store.prevX[self.index]),
+			float(self.store.prevY[self.index]))
+
+	@prevPos.setter
+	def prevPos(self, value):
+		if self.store is None:
+			self._prevPos = value
+		else:
+			self.store.prevX[self.index], self.store.prevY[self.index] = value
+
+	def __iadd__(self, p):
+		self.x += p.x
+		self.y += p.y
+		return self
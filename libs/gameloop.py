@@ -0,0 +1,89 @@
+"""Fixed timestep game loop.
+
+The simulation advances in ticks of a constant length no matter how fast
+frames are rendered. Time left over between ticks is kept in an
+accumulator and passed to the renderer as an interpolation factor, so
+that entities can be drawn between their last two positions. Frames can
+be capped to a maximum rate, the loop then sleeps instead of drawing the
+same interpolated scene over and over.
+
+FixedStepLoop  -- game loop with a fixed simulation tick
+"""
+
+import time
+
+class FixedStepLoop():
+	"""Game loop with a fixed simulation tick.
+
+	Attributes:
+		tickRate (int): Number of simulation ticks per second.
+		maxFrameTime (float): Longest frame in seconds the loop tries to
+			catch up with. Longer frames slow the game down instead of
+			running a burst of ticks.
+		maxFps (int): Maximum number of frames rendered per second, None
+			for no limit.
+		frames (int): Number of frames rendered so far.
+		ticks (int): Number of ticks simulated so far.
+	"""
+
+	def __init__(self, update, render, tickRate=60, maxFrameTime=0.25,
+		maxFps=None, clock=time.perf_counter, sleep=time.sleep):
+		"""Initializes a FixedStepLoop instance.
+
+		Args:
+			update (callable): Advances the simulation by one tick.
+			render (callable): Draws a frame. Gets the interpolation
+				factor between the previous and the current tick, a
+				float from 0 to 1.
+			tickRate (int): Number of ticks per second.
+			maxFrameTime (float): Longest frame to catch up with in
+				seconds.
+			maxFps (int): Maximum number of frames per second, None
+				for no limit.
+			clock (callable): Returns current time in seconds.
+			sleep (callable): Waits for the given number of seconds.
+		"""
+
+		self.update = update
+		self.render = render
+		self.tickRate = tickRate
+		self.maxFrameTime = maxFrameTime
+		self.maxFps = maxFps
+		self.clock = clock
+		self.sleep = sleep
+		self.frames = 0
+		self.ticks = 0
+
+	@property
+	def tickLength(self):
+		"""Length of a single tick in seconds."""
+
+		return 1 / self.tickRate
+
+	def run(self, running):
+		"""Runs the loop.
+
+		Args:
+			running (callable): Returns False when the loop should
+				stop. Checked after every tick.
+		"""
+
+		tickLength = self.tickLength
+		accumulator = 0.0
+		previous = self.clock()
+		while running():
+			now = self.clock()
+			accumulator += min(now - previous, self.maxFrameTime)
+			previous = now
+			while accumulator >= tickLength:
+				self.update()
+				self.ticks += 1
+				accumulator -= tickLength
+				if not running():
+					return
+			self.render(accumulator / tickLength)
+			self.frames += 1
+			if self.maxFps is not None:
+				delay = now + 1 / self.maxFps - self.clock()
+				if delay > 0:
+					self.sleep(delay)
@@ -0,0 +1,143 @@
+"""Vectorized geometry on many rectangles and points at once.
+
+The point module answers questions about a single pair of shapes. The
+functions here take whole arrays of rectangles and points and answer
+many-to-many queries with a single NumPy operation, returning indices of
+the matching items.
+
+Rectangles are arrays of shape (n, 4) holding left, top, right and
+bottom, as in point.Rect. Points are arrays of shape (n, 2).
+
+NumPy is optional, the functions raise ImportError when it is missing.
+
+asBoxes  -- convert rectangles to an array
+asPoints  -- convert points to an array
+overlapPairs  -- pairs of overlapping rectangles
+containedPairs  -- pairs of rectangles and points inside them
+insideMask  -- which points lie inside a rectangle
+nearestPoints  -- nearest target point of every source point
+"""
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+def _requireNumpy():
+	if numpy is None:
+		raise ImportError("libs.geometry requires numpy")
+
+def asBoxes(rects):
+	"""Converts rectangles to an array of boxes.
+
+	Args:
+		rects (iterable): point.Rect objects, pygame.Rect objects or
+			(left, top, width, height) sequences.
+
+	Returns:
+		numpy.ndarray: Array of shape (n, 4) with left, top, right and
+			bottom of each rectangle.
+	"""
+
+	_requireNumpy()
+	rows = []
+	for rect in rects:
+		if hasattr(rect, "right") and not hasattr(rect, "width"):
+			rows.append((rect.left, rect.top, rect.right, rect.bottom))
+		else:
+			left, top, width, height = rect
+			rows.append((left, top, left + width, top + height))
+	return numpy.array(rows, dtype=float).reshape(-1, 4)
+
+def asPoints(points):
+	"""Converts points to an array.
+
+	Args:
+		points (iterable): point.Point objects or (x, y) sequences.
+
+	Returns:
+		numpy.ndarray: Array of shape (n, 2).
+	"""
+
+	_requireNumpy()
+	rows = [(p.x, p.y) if hasattr(p, "x") else tuple(p) for p in points]
+	return numpy.array(rows, dtype=float).reshape(-1, 2)
+
+def overlapPairs(boxesA, boxesB):
+	"""Finds all overlapping pairs of rectangles from two arrays.
+
+	Rectangles touching only by their edges do not overlap, the same as
+	in point.Rect.overlaps and pygame.Rect.colliderect.
+
+	Args:
+		boxesA (numpy.ndarray): First array of boxes, shape (n, 4).
+		boxesB (numpy.ndarray): Second array of boxes, shape (m, 4).
+
+	Returns:
+		tuple of numpy.ndarray: Indices into 'boxesA' and 'boxesB' of
+			the overlapping pairs, sorted by the first index.
+	"""
+
+	_requireNumpy()
+	a = boxesA[:, None, :]
+	b = boxesB[None, :, :]
+	mask = ((a[..., 2] > b[..., 0]) & (a[..., 0] < b[..., 2]) &
+		(a[..., 3] > b[..., 1]) & (a[..., 1] < b[..., 3]))
+	return numpy.nonzero(mask)
+
+def containedPairs(boxes, points):
+	"""Finds all pairs of a rectangle and a point inside it.
+
+	Points on the edges count as inside, the same as in
+	point.Rect.contains.
+
+	Args:
+		boxes (numpy.ndarray): Array of boxes, shape (n, 4).
+		points (numpy.ndarray): Array of points, shape (m, 2).
+
+	Returns:
+		tuple of numpy.ndarray: Indices into 'boxes' and 'points', sorted
+			by the box index.
+	"""
+
+	_requireNumpy()
+	b = boxes[:, None, :]
+	p = points[None, :, :]
+	mask = ((b[..., 0] <= p[..., 0]) & (p[..., 0] <= b[..., 2]) &
+		(b[..., 1] <= p[..., 1]) & (p[..., 1] <= b[..., 3]))
+	return numpy.nonzero(mask)
+
+def insideMask(box, points):
+	"""Tells which points lie inside a single rectangle.
+
+	Args:
+		box (sequence): Left, top, right and bottom of the rectangle.
+		points (numpy.ndarray): Array of points, shape (n, 2).
+
+	Returns:
+		numpy.ndarray: Boolean array of shape (n,).
+	"""
+
+	_requireNumpy()
+	left, top, right, bottom = box
+	x = points[:, 0]
+	y = points[:, 1]
+	return (left <= x) & (x <= right) & (top <= y) & (y <= bottom)
+
+def nearestPoints(sources, targets):
+	"""Finds the nearest target of every source point.
+
+	Args:
+		sources (numpy.ndarray): Array of points, shape (n, 2).
+		targets (numpy.ndarray): Array of points, shape (m, 2), m > 0.
+
+	Returns:
+		tuple of numpy.ndarray: Index of the nearest target and the
+			distance to it for every source.
+	"""
+
+	_requireNumpy()
+	delta = sources[:, None, :] - targets[None, :, :]
+	distances = numpy.hypot(delta[..., 0], delta[..., 1])
+	indices = numpy.argmin(distances, axis=1)
+	return indices, distances[numpy.arange(len(sources)), indices]
@@ -0,0 +1,116 @@
+"""Cached rendering of the head-up display.
+
+Rendering text with a font and drawing the health bar pixel by pixel is
+slow, while the displayed values change only a few times per second.
+The classes here keep the rendered surfaces and redo the work only when
+a value changes.
+
+TextCache  -- rendered text surfaces keyed by the text
+HealthBar  -- health bar composed into a single surface
+"""
+
+import collections
+import pygame
+
+class TextCache():
+	"""Rendered text surfaces keyed by the text.
+
+	Attributes:
+		font (pygame.font.Font): Font to render with.
+		color (tuple of int): Color of the text.
+		antialias (bool): Whether to render antialiased text.
+		capacity (int): Number of surfaces kept. The least recently
+			used ones are dropped first.
+	"""
+
+	def __init__(self, font, color, antialias=False, capacity=64):
+		"""Initializes a TextCache instance.
+
+		Args:
+			font (pygame.font.Font): Font to render with.
+			color (tuple of int): Color of the text.
+			antialias (bool): Whether to render antialiased text.
+			capacity (int): Number of surfaces to keep.
+		"""
+
+		self.font = font
+		self.color = color
+		self.antialias = antialias
+		self.capacity = capacity
+		self._surfaces = collections.OrderedDict()
+
+	def render(self, text):
+		"""Returns the text rendered to a surface.
+
+		Args:
+			text (str): Text to render.
+
+		Returns:
+			pygame.Surface: Rendered text. Do not modify it, the
+				surface is shared.
+		"""
+
+		surface = self._surfaces.get(text)
+		if surface is None:
+			surface = self.font.render(text, self.antialias, self.color)
+			self._surfaces[text] = surface
+			if len(self._surfaces) > self.capacity:
+				self._surfaces.popitem(last=False)
+		else:
+			self._surfaces.move_to_end(text)
+		return surface
+
+class HealthBar():
+	"""Health bar composed into a single surface.
+
+	The fill image is stretched to the full width once. Whenever the
+	value changes, the frame and the visible part of the fill are
+	composed again, so drawing the bar is a single blit.
+
+	Attributes:
+		frameImage (pygame.Surface): Frame of the bar.
+		fillImage (pygame.Surface): Fill stretched to the maximum value,
+			one pixel per point.
+		fillOffset (tuple of int): Position of the fill in the frame.
+	"""
+
+	def __init__(self, frameImage, fillImage, maxValue, fillOffset=(3, 3)):
+		"""Initializes a HealthBar instance.
+
+		Args:
+			frameImage (pygame.Surface): Frame of the bar.
+			fillImage (pygame.Surface): One pixel wide piece of the
+				fill.
+			maxValue (int): Value of a full bar.
+			fillOffset (tuple of int): Position of the fill in the
+				frame.
+		"""
+
+		self._pointWidth = fillImage.get_width()
+		self.frameImage = frameImage
+		self.fillImage = pygame.transform.scale(fillImage,
+			(maxValue * fillImage.get_width(), fillImage.get_height()))
+		self.fillOffset = fillOffset
+		self._value = None
+		self._image = None
+
+	def image(self, value):
+		"""Returns the bar showing a value.
+
+		Args:
+			value (int): Value to show. Values out of range are
+				clamped.
+
+		Returns:
+			pygame.Surface: Composed bar. Do not modify it, the
+				surface is shared.
+		"""
+
+		if value != self._value:
+			self._image = self.frameImage.copy()
+			width = value * self._pointWidth
+			width = max(0, min(width, self.fillImage.get_width()))
+			self._image.blit(self.fillImage, self.fillOffset,
+				pygame.Rect(0, 0, width, self.fillImage.get_height()))
+			self._value = value
+		return self._image
@@ -0,0 +1,205 @@
+"""Recording and replaying of player input.
+
+A game session seeded with a known random generator is a pure function
+of its input, so recording the input of every tick is enough to run the
+same session again, at real speed or headless as fast as possible. The
+log stores only what the game reacts to: the movement keys held, the
+mouse position and the number of clicks in every tick. Checksums of the
+game state are stored at intervals, so that a replay which went a
+different way is detected.
+
+File layout: a header packed as "<8sHHBq" with the magic, format
+version, tick rate, flags and seed, followed by records. Every record
+starts with a tag byte. A tick record ("<BBhhB") holds the key bitmask
+and quit flag, the mouse position and the number of clicks. A checksum
+record ("<BII") holds a tick number and the state checksum before that
+tick.
+
+InputRecorder  -- input source writing the input of another one to a log
+ReplayInput  -- input source reading a log
+"""
+
+import struct
+import pygame
+from libs import inputsource
+
+_MAGIC = b"BUNNYINP"
+_VERSION = 1
+_HEADER = struct.Struct("<8sHHBq")
+_TICK = struct.Struct("<BBhhB")
+_CHECK = struct.Struct("<BII")
+_TAG_TICK = 0
+_TAG_CHECK = 1
+
+# Keys recorded in the bitmask, bit 0 first.
+KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+_QUIT = 1 << len(KEYS)
+_ENTITY_STORE = 1
+
+class InputRecorder():
+	"""Input source writing the input of another one to a log.
+
+	The mouse position is sampled once per tick, when the events are
+	read, so that the recorded game sees exactly what is written.
+
+	Attributes:
+		checksum (callable): Returns the checksum of the game state,
+			written every 'interval' ticks. None to write no checksums.
+		interval (int): Number of ticks between checksums.
+		tick (int): Number of ticks recorded so far.
+	"""
+
+	def __init__(self, source, path, tickRate, seed, entityStore=False,
+		interval=60):
+		"""Initializes an InputRecorder instance.
+
+		Args:
+			source: Input source to record, e.g. an
+				inputsource.PygameInput.
+			path (str): Path of the log to write.
+			tickRate (int): Number of ticks per second of the game.
+			seed (int): Seed of the game's random generator.
+			entityStore (bool): Whether the game keeps entities in an
+				entity store, which may round differently.
+			interval (int): Number of ticks between checksums.
+		"""
+
+		self.checksum = None
+		self.interval = interval
+		self.tick = 0
+		self._source = source
+		self._keys = 0
+		self._mousePos = None
+		self._file = open(path, "wb")
+		self._file.write(_HEADER.pack(_MAGIC, _VERSION, tickRate,
+			_ENTITY_STORE if entityStore else 0, seed))
+
+	def getEvents(self):
+		"""Returns the events of the recorded source and logs them."""
+
+		if self.checksum is not None and self.tick % self.interval == 0:
+			self._file.write(_CHECK.pack(_TAG_CHECK, self.tick,
+				self.checksum()))
+		events = self._source.getEvents()
+		self._mousePos = self._source.getMousePos()
+		clicks = 0
+		flags = 0
+		for event in events:
+			if event.type == pygame.KEYDOWN and event.key in KEYS:
+				self._keys |= 1 << KEYS.index(event.key)
+			elif event.type == pygame.KEYUP and event.key in KEYS:
+				self._keys &= ~(1 << KEYS.index(event.key))
+			elif event.type == pygame.MOUSEBUTTONDOWN:
+				clicks += 1
+			elif event.type == pygame.QUIT:
+				flags = _QUIT
+		self._file.write(_TICK.pack(_TAG_TICK, self._keys | flags,
+			self._mousePos[0], self._mousePos[1], min(clicks, 255)))
+		self.tick += 1
+		return events
+
+	def getMousePos(self):
+		"""Returns the mouse position sampled in the current tick."""
+
+		if self._mousePos is None:
+			return self._source.getMousePos()
+		return self._mousePos
+
+	def close(self):
+		"""Finishes the log."""
+
+		self._file.close()
+
+class ReplayInput():
+	"""Input source reading a log.
+
+	Events of a tick are reconstructed from the differences to the
+	previous one. When the log ends, a QUIT event stops the game.
+
+	Attributes:
+		tickRate (int): Number of ticks per second of the recorded
+			game.
+		seed (int): Seed of the recorded game's random generator.
+		entityStore (bool): Whether the recorded game kept entities in
+			an entity store.
+		checksum (callable): Returns the checksum of the game state to
+			compare with the recorded ones. None to skip verification.
+		verified (int): Number of checksums which matched.
+		mismatches (list of tuple): Tick, recorded and actual checksum
+			of every checksum which did not match.
+		tick (int): Number of ticks replayed so far.
+		source: Optional live input source, only QUIT events are taken
+			from it so that the window can still be closed.
+	"""
+
+	def __init__(self, path, source=None):
+		"""Reads a log written by InputRecorder.
+
+		Args:
+			path (str): Path of the log.
+			source: Optional live input source to take QUIT events from.
+
+		Raises:
+			ValueError: The file is not an input log of this version.
+		"""
+
+		with open(path, "rb") as log:
+			data = log.read()
+		magic, version, self.tickRate, flags, self.seed = \
+			_HEADER.unpack_from(data)
+		if magic != _MAGIC or version != _VERSION:
+			raise ValueError("{} is not an input log of version {}".format(
+				path, _VERSION))
+		self.entityStore = bool(flags & _ENTITY_STORE)
+		self.checksum = None
+		self.verified = 0
+		self.mismatches = []
+		self.tick = 0
+		self.source = source
+		self._data = data
+		self._offset = _HEADER.size
+		self._keys = 0
+		self._mousePos = (0, 0)
+
+	def getEvents(self):
+		"""Returns the events of the next tick of the log."""
+
+		data = self._data
+		while (self._offset < len(data) and
+			data[self._offset] == _TAG_CHECK):
+			_, tick, expected = _CHECK.unpack_from(data, self._offset)
+			self._offset += _CHECK.size
+			if self.checksum is not None:
+				actual = self.checksum()
+				if actual == expected:
+					self.verified += 1
+				else:
+					self.mismatches.append((tick, expected, actual))
+		if self._offset >= len(data):
+			return [pygame.event.Event(pygame.QUIT)]
+
+		events = []
+		if self.source is not None:
+			events = [event for event in self.source.getEvents()
+				if event.type == pygame.QUIT]
+		_, flags, x, y, clicks = _TICK.unpack_from(data, self._offset)
+		self._offset += _TICK.size
+		self._mousePos = (x, y)
+		for bit, key in enumerate(KEYS):
+			mask = 1 << bit
+			if flags & mask and not self._keys & mask:
+				events.append(inputsource.keyDown(key))
+			elif not flags & mask and self._keys & mask:
+				events.append(inputsource.keyUp(key))
+		self._keys = flags & ~_QUIT
+		for _ in range(clicks):
+			events.append(inputsource.click(self._mousePos))
+		if flags & _QUIT:
+			events.append(pygame.event.Event(pygame.QUIT))
+		self.tick += 1
+		return events
+
+	def getMousePos(self):
+		"""Returns the mouse position of the current tick."""
+
+		return self._mousePos
@@ -0,0 +1,86 @@
+"""Sources of player input.
+
+The game reads events and the mouse position through an input source
+instead of asking pygame directly, so that it can be driven by a script
+when running without a display.
+
+PygameInput  -- live input from pygame's event queue and mouse
+ScriptedInput  -- input replayed from a prepared list of frames
+keyDown  -- construct a KEYDOWN event
+keyUp  -- construct a KEYUP event
+click  -- construct a MOUSEBUTTONDOWN event
+"""
+
+import pygame
+
+def keyDown(key):
+	"""Returns a KEYDOWN event for a pygame key constant."""
+
+	return pygame.event.Event(pygame.KEYDOWN, key=key)
+
+def keyUp(key):
+	"""Returns a KEYUP event for a pygame key constant."""
+
+	return pygame.event.Event(pygame.KEYUP, key=key)
+
+def click(pos, button=1):
+	"""Returns a MOUSEBUTTONDOWN event at a position."""
+
+	return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+
+class PygameInput():
+	"""Live input from pygame's event queue and mouse."""
+
+	def getEvents(self):
+		"""Returns events which happened since the last call."""
+
+		return pygame.event.get()
+
+	def getMousePos(self):
+		"""Returns the current mouse position as a tuple (x, y)."""
+
+		return pygame.mouse.get_pos()
+
+class ScriptedInput():
+	"""Input replayed from a prepared list of frames.
+
+	Every call to getEvents() advances the script by one frame. When the
+	script runs out, no more events are produced and the mouse stays
+	where it was last.
+
+	Attributes:
+		mousePos (tuple of int): Mouse position of the current frame.
+		frame (int): Number of frames consumed so far.
+	"""
+
+	def __init__(self, frames, mousePos=(0, 0)):
+		"""Initializes a ScriptedInput instance.
+
+		Args:
+			frames (iterable of tuple): Pairs of (mousePos, events),
+				one per tick. 'mousePos' may be None to keep the
+				previous position.
+			mousePos (tuple of int): Mouse position before the first
+				frame.
+		"""
+
+		self._frames = iter(frames)
+		self.mousePos = mousePos
+		self.frame = 0
+
+	def getEvents(self):
+		"""Advances the script by one frame and returns its events."""
+
+		try:
+			mousePos, events = next(self._frames)
+		except StopIteration:
+			return []
+		self.frame += 1
+		if mousePos is not None:
+			self.mousePos = mousePos
+		return list(events)
+
+	def getMousePos(self):
+		"""Returns the mouse position of the current frame."""
+
+		return self.mousePos
@@ -0,0 +1,103 @@
+"""Background music streamed from disk.
+
+pygame.mixer.music decodes a track in small chunks while it plays, so
+even long tracks take little memory, and it handles compressed formats
+like OGG Vorbis and MP3. MusicPlayer opens the track in a background
+thread, so that the game starts without waiting for it, and plays
+nothing but a warning when the track cannot be found or opened.
+
+MusicPlayer  -- plays a looping track without blocking the game
+"""
+
+import os
+import threading
+import warnings
+import pygame
+
+# Formats tried for a track, most preferred first. Compressed formats
+# take less space on disk and stream just as well.
+EXTENSIONS = (".ogg", ".mp3", ".flac", ".wav")
+
+def findTrack(path):
+	"""Returns the path of a track file, trying all the known formats.
+
+	Args:
+		path (str): Path to the track, with or without an extension.
+
+	Returns:
+		str: Path of an existing file, None if there is none.
+	"""
+
+	if os.path.isfile(path):
+		return path
+	base = os.path.splitext(path)[0]
+	for extension in EXTENSIONS:
+		if os.path.isfile(base + extension):
+			return base + extension
+	return None
+
+class MusicPlayer():
+	"""Plays a looping track without blocking the game.
+
+	Attributes:
+		track (str): Path of the file being played, None while nothing
+			plays.
+	"""
+
+	def __init__(self):
+		self.track = None
+		self._thread = None
+
+	def play(self, path, volume=1.0, loops=-1):
+		"""Starts playing a track in the background.
+
+		If the track does not exist in any of the known formats or the
+		mixer fails to open it, a warning is issued and the game stays
+		silent.
+
+		Args:
+			path (str): Path to the track, with or without an
+				extension.
+			volume (float): Volume from 0 to 1.
+			loops (int): Number of repetitions, -1 to loop forever.
+		"""
+
+		self.wait()
+		self._thread = threading.Thread(target=self._start,
+			args=(path, volume, loops), daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		"""Stops the music."""
+
+		self.wait()
+		if self.track is not None:
+			pygame.mixer.music.stop()
+			self.track = None
+
+	def wait(self, timeout=None):
+		"""Waits until the track being opened starts playing.
+
+		Args:
+			timeout (float): Maximum number of seconds to wait, None
+				to wait as long as it takes.
+		"""
+
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	def _start(self, path, volume, loops):
+		track = findTrack(path)
+		if track is None:
+			warnings.warn("music track {} not found, playing no music".format(
+				path), RuntimeWarning)
+			return
+		try:
+			pygame.mixer.music.load(track)
+			pygame.mixer.music.set_volume(volume)
+			pygame.mixer.music.play(loops)
+		except pygame.error as error:
+			warnings.warn("cannot play music track {}: {}".format(track, error),
+				RuntimeWarning)
+			return
+		self.track = track
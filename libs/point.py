@@ -3,7 +3,10 @@
 This code is in the public domain.
 
 Point  -- point with (x,y) coordinates
+FrozenPoint  -- immutable, hashable point for shared constants
 Rect  -- two points, forming a rectangle
+slide_all  -- move many points in place
+as_tuples  -- construct tuples (x,y) of many points
 """
 
 import math
@@ -13,7 +16,10 @@ class Point:
     
     """A point identified by (x,y) coordinates.
     
-    supports: +, -, *, /, str, repr
+    supports: +, -, *, /, +=, -=, *=, /=, str, repr
+    
+    The in-place operators modify the point instead of allocating a
+    new one, use them in code running every tick.
     
     length  -- calculate length of vector to point from origin
     distance_to  -- calculate distance between two points
@@ -28,6 +34,8 @@ class Point:
     rotate_about  -- rotate around another point
     """
     
+    __slots__ = ("x", "y")
+    
     def __init__(self, x=0.0, y=0.0):
         self.x = x
         self.y = y
@@ -44,10 +52,36 @@ class Point:
         """Point(x1*x2, y1*y2)"""
         return Point(self.x*scalar, self.y*scalar)
     
-    def __div__(self, scalar):
+    def __truediv__(self, scalar):
         """Point(x1/x2, y1/y2)"""
         return Point(self.x/scalar, self.y/scalar)
     
+    __div__ = __truediv__
+    
+    def __iadd__(self, p):
+        """Move to (x1+x2, y1+y2) in place."""
+        self.x += p.x
+        self.y += p.y
+        return self
+    
+    def __isub__(self, p):
+        """Move to (x1-x2, y1-y2) in place."""
+        self.x -= p.x
+        self.y -= p.y
+        return self
+    
+    def __imul__(self, scalar):
+        """Scale by scalar in place."""
+        self.x *= scalar
+        self.y *= scalar
+        return self
+    
+    def __itruediv__(self, scalar):
+        """Divide by scalar in place."""
+        self.x /= scalar
+        self.y /= scalar
+        return self
+    
     def __str__(self):
         return "(%s, %s)" % (self.x, self.y)
     
@@ -131,6 +165,54 @@ class Point:
         return result
 
 
+class FrozenPoint(Point):
+    
+    """An immutable point.
+    
+    Use it for constants shared by many objects, e.g. velocity vectors,
+    instead of allocating the same point over and over. Arithmetic
+    returns regular mutable points, in-place operators rebind the name
+    instead of modifying the point. Frozen points are hashable.
+    """
+    
+    __slots__ = ()
+    
+    def __init__(self, x=0.0, y=0.0):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenPoint is immutable")
+    
+    __iadd__ = Point.__add__
+    __isub__ = Point.__sub__
+    __imul__ = Point.__mul__
+    __itruediv__ = Point.__truediv__
+    
+    def __eq__(self, p):
+        return (isinstance(p, Point) and
+                self.x == p.x and self.y == p.y)
+    
+    def __hash__(self):
+        return hash((self.x, self.y))
+    
+    def clone(self):
+        """Return a mutable copy of this point."""
+        return Point(self.x, self.y)
+
+
+def slide_all(points, dx, dy):
+    """Move every point in place by (dx, dy)."""
+    for p in points:
+        p.x += dx
+        p.y += dy
+
+
+def as_tuples(points):
+    """Return a list of (x, y) tuples of the points."""
+    return [(p.x, p.y) for p in points]
+
+
 class Rect:
 
     """A rectangle identified by two points.
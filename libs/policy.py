@@ -0,0 +1,185 @@
+"""Input decided by the program instead of a player.
+
+An input policy looks at the game state every tick and decides where the
+mouse points and which keys and buttons are pressed. PolicyInput turns a
+policy into an input source the game reads like live input, so that the
+game can be played by a bot, on screen or headless.
+
+InputPolicy  -- base class of policies, does nothing
+AimBot  -- shoots the nearest badger, leading the shot
+PolicyInput  -- input source driven by a policy
+leadTarget  -- where to shoot to hit a moving target
+"""
+
+import math
+import pygame
+from libs import inputsource
+
+def leadTarget(origin, pos, velocity, speed):
+	"""Returns where to shoot to hit a moving target.
+
+	Args:
+		origin (point.Point): Position the projectile starts from.
+		pos (point.Point): Current position of the target.
+		velocity (point.Point): Vector the target moves by every tick.
+		speed (float): Distance the projectile travels every tick.
+
+	Returns:
+		tuple of float: Position where the projectile meets the target,
+			None if it cannot catch up with it.
+	"""
+
+	dx = pos.x - origin.x
+	dy = pos.y - origin.y
+	a = velocity.x * velocity.x + velocity.y * velocity.y - speed * speed
+	b = 2 * (dx * velocity.x + dy * velocity.y)
+	c = dx * dx + dy * dy
+	if abs(a) < 1e-9:
+		if b >= 0:
+			return None
+		time = -c / b
+	else:
+		discriminant = b * b - 4 * a * c
+		if discriminant < 0:
+			return None
+		root = math.sqrt(discriminant)
+		times = [t for t in ((-b - root) / (2 * a), (-b + root) / (2 * a))
+			if t >= 0]
+		if not times:
+			return None
+		time = min(times)
+	return (pos.x + velocity.x * time, pos.y + velocity.y * time)
+
+class InputPolicy():
+	"""Base class of policies, does nothing.
+
+	Subclasses override decide().
+	"""
+
+	def decide(self, game):
+		"""Decides the input of the next tick.
+
+		Args:
+			game (Game): The game being played.
+
+		Returns:
+			tuple: Mouse position, None to keep the previous one, and a
+				list of events.
+		"""
+
+		return None, []
+
+class AimBot(InputPolicy):
+	"""Shoots the nearest badger, leading the shot.
+
+	The bot aims where the arrow meets the badger if both keep their
+	velocity, and walks up and down to stay level with its target.
+
+	Attributes:
+		arrowSpeed (float): Distance an arrow travels every tick.
+		fireInterval (int): Number of ticks between shots.
+		margin (float): Vertical distance from the target within which
+			the bot stands still.
+	"""
+
+	def __init__(self, arrowSpeed, fireInterval=4, margin=10):
+		"""Initializes an AimBot instance.
+
+		Args:
+			arrowSpeed (float): Distance an arrow travels every tick.
+			fireInterval (int): Number of ticks between shots, at
+				least 1.
+			margin (float): Vertical distance from the target within
+				which the bot stands still.
+
+		Raises:
+			ValueError: The fire interval is less than 1.
+		"""
+
+		if fireInterval < 1:
+			raise ValueError("fire interval must be at least 1, not {}".format(
+				fireInterval))
+		self.arrowSpeed = arrowSpeed
+		self.fireInterval = fireInterval
+		self.margin = margin
+		self._tick = 0
+		self._held = None
+
+	def decide(self, game):
+		player = game.player.pos
+		target = None
+		nearest = None
+		for badger in game.badgerList:
+			dx = badger.pos.x - player.x
+			dy = badger.pos.y - player.y
+			distance = dx * dx + dy * dy
+			if nearest is None or distance < nearest:
+				target = badger
+				nearest = distance
+
+		events = []
+		mousePos = None
+		key = None
+		if target is not None:
+			aim = leadTarget(player, target.pos, target.velocity,
+				self.arrowSpeed)
+			if aim is not None:
+				mousePos = (int(round(aim[0])), int(round(aim[1])))
+				if self._tick % self.fireInterval == 0:
+					events.append(inputsource.click(mousePos))
+			if target.pos.y > player.y + self.margin:
+				key = pygame.K_s
+			elif target.pos.y < player.y - self.margin:
+				key = pygame.K_w
+		if key != self._held:
+			if self._held is not None:
+				events.append(inputsource.keyUp(self._held))
+			if key is not None:
+				events.append(inputsource.keyDown(key))
+			self._held = key
+		self._tick += 1
+		return mousePos, events
+
+class PolicyInput():
+	"""Input source driven by a policy.
+
+	Attributes:
+		policy (InputPolicy): Decides the input.
+		game (Game): The game being played. Set it after creating the
+			game, no input is produced before.
+		source: Optional live input source, only QUIT events are taken
+			from it so that the window can still be closed.
+		mousePos (tuple of int): Mouse position decided by the policy.
+	"""
+
+	def __init__(self, policy, source=None):
+		"""Initializes a PolicyInput instance.
+
+		Args:
+			policy (InputPolicy): Decides the input.
+			source: Optional live input source to take QUIT events from.
+		"""
+
+		self.policy = policy
+		self.game = None
+		self.source = source
+		self.mousePos = (0, 0)
+
+	def getEvents(self):
+		"""Returns the events decided by the policy for this tick."""
+
+		events = []
+		if self.source is not None:
+			events = [event for event in self.source.getEvents()
+				if event.type == pygame.QUIT]
+		if self.game is not None:
+			mousePos, decided = self.policy.decide(self.game)
+			if mousePos is not None:
+				self.mousePos = mousePos
+			events.extend(decided)
+		return events
+
+	def getMousePos(self):
+		"""Returns the mouse position decided by the policy."""
+
+		return self.mousePos
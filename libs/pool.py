@@ -0,0 +1,76 @@
+"""Pools of reusable objects.
+
+Entities like arrows are created and thrown away many times per second.
+ObjectPool keeps released objects around and hands them out again after
+resetting them, instead of allocating new ones.
+
+ObjectPool  -- recycles objects of a single kind
+"""
+
+class ObjectPool():
+	"""Recycles objects of a single kind.
+
+	Attributes:
+		factory (callable): Creates a new object from the arguments
+			passed to acquire().
+		reset (callable): Prepares a recycled object for reuse. Gets the
+			object followed by the arguments passed to acquire().
+		capacity (int): Maximum number of released objects kept.
+		hits (int): Number of objects served from the pool.
+		misses (int): Number of objects which had to be created.
+		discarded (int): Number of released objects dropped because the
+			pool was full.
+	"""
+
+	def __init__(self, factory, reset, capacity=256):
+		"""Initializes an ObjectPool instance.
+
+		Args:
+			factory (callable): Creates a new object.
+			reset (callable): Prepares a recycled object for reuse.
+			capacity (int): Maximum number of released objects kept.
+		"""
+
+		self.factory = factory
+		self.reset = reset
+		self.capacity = capacity
+		self.hits = 0
+		self.misses = 0
+		self.discarded = 0
+		self._free = []
+
+	def acquire(self, *args):
+		"""Returns an object initialized with the arguments.
+
+		Args:
+			*args: Arguments for the factory or the reset function.
+		"""
+
+		if self._free:
+			obj = self._free.pop()
+			self.reset(obj, *args)
+			self.hits += 1
+			return obj
+		self.misses += 1
+		return self.factory(*args)
+
+	def release(self, obj):
+		"""Returns an object no longer in use to the pool.
+
+		The caller must not use the object after releasing it.
+		"""
+
+		if len(self._free) < self.capacity:
+			self._free.append(obj)
+		else:
+			self.discarded += 1
+
+	@property
+	def hitRate(self):
+		"""Share of acquired objects served from the pool, from 0 to 1."""
+
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def __len__(self):
+		return len(self._free)
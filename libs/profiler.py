@@ -0,0 +1,161 @@
+"""Frame time profiler.
+
+Measures how long the phases of the game loop take and keeps the timings
+of the last frames in a ring buffer. The timings can be summarized as
+percentiles, shown in an on-screen overlay or dumped into a CSV or JSON
+trace.
+
+FrameProfiler  -- per-phase timings of recent frames
+"""
+
+import collections
+import csv
+import json
+import time
+
+class FrameProfiler():
+	"""Per-phase timings of recent frames.
+
+	Phases are measured with measure() and summed up until endFrame() is
+	called, so a phase running several times in a frame is reported
+	once with the total time.
+
+	Attributes:
+		frames (collections.deque): Timings of the last frames. Each
+			item is a dict mapping phase names to seconds, with the
+			whole frame under 'frame'.
+		phases (list of str): Names of all phases seen, in order of
+			their first appearance.
+		overlayInterval (int): Number of frames between overlay text
+			updates.
+	"""
+
+	def __init__(self, size=300, clock=time.perf_counter, overlayInterval=30):
+		"""Initializes a FrameProfiler instance.
+
+		Args:
+			size (int): Number of frames to keep.
+			clock (callable): Returns current time in seconds.
+			overlayInterval (int): Number of frames between overlay
+				text updates.
+		"""
+
+		self.frames = collections.deque(maxlen=size)
+		self.phases = []
+		self.clock = clock
+		self.overlayInterval = overlayInterval
+		self._current = {}
+		self._frameStart = clock()
+		self._overlay = []
+		self._overlayAge = overlayInterval
+
+	def measure(self, name, func, *args):
+		"""Calls a function and adds its run time to a phase.
+
+		Args:
+			name (str): Name of the phase.
+			func (callable): Function to call.
+			*args: Arguments passed to the function.
+
+		Returns:
+			Whatever the function returns.
+		"""
+
+		start = self.clock()
+		result = func(*args)
+		elapsed = self.clock() - start
+		current = self._current
+		if name in current:
+			current[name] += elapsed
+		else:
+			current[name] = elapsed
+			if name not in self.phases:
+				self.phases.append(name)
+		return result
+
+	def endFrame(self):
+		"""Closes the current frame and stores its timings."""
+
+		now = self.clock()
+		self._current["frame"] = now - self._frameStart
+		self.frames.append(self._current)
+		self._current = {}
+		self._frameStart = now
+		self._overlayAge += 1
+
+	def percentiles(self, name, percents=(50, 95, 99)):
+		"""Returns percentiles of a phase over the stored frames.
+
+		Args:
+			name (str): Name of the phase, or 'frame' for whole frames.
+			percents (tuple of int): Percentiles to compute.
+
+		Returns:
+			tuple of float: Times in seconds, one per percentile. Empty
+				frames count as zero.
+		"""
+
+		values = sorted(frame.get(name, 0.0) for frame in self.frames)
+		if not values:
+			return tuple(0.0 for _ in percents)
+		result = []
+		for percent in percents:
+			rank = max(0, min(len(values) - 1,
+				int(round(percent / 100 * len(values))) - 1))
+			result.append(values[rank])
+		return tuple(result)
+
+	def summary(self):
+		"""Returns lines describing median and 95th percentile of every
+		phase in milliseconds."""
+
+		lines = []
+		for name in ["frame"] + self.phases:
+			p50, p95 = self.percentiles(name, (50, 95))
+			lines.append("{} {:.2f} / {:.2f} ms".format(
+				name, p50 * 1000, p95 * 1000))
+		return lines
+
+	def drawOverlay(self, draw, font, pos=(5, 30), color=(0, 0, 0)):
+		"""Draws the summary on screen.
+
+		The text is re-rendered only every 'overlayInterval' frames.
+
+		Args:
+			draw (callable): Draws an image, gets the image and its
+				top left corner.
+			font (pygame.font.Font): Font of the text.
+			pos (tuple of int): Top left corner of the overlay.
+			color (tuple of int): Color of the text.
+		"""
+
+		if self._overlayAge >= self.overlayInterval:
+			self._overlay = [font.render(line, False, color)
+				for line in self.summary()]
+			self._overlayAge = 0
+		x, y = pos
+		for image in self._overlay:
+			draw(image, (x, y))
+			y += image.get_height()
+
+	def dump(self, path):
+		"""Writes the stored frames to a file.
+
+		Args:
+			path (str): Path of the file. Files ending with '.json' get
+				a JSON trace, anything else a CSV table.
+		"""
+
+		columns = ["frame"] + self.phases
+		with open(path, "w", newline="") as output:
+			if path.endswith(".json"):
+				json.dump({
+					"phases": columns,
+					"frames": [[frame.get(name, 0.0) for name in columns]
+						for frame in self.frames]},
+					output)
+			else:
+				writer = csv.writer(output)
+				writer.writerow(columns)
+				for frame in self.frames:
+					writer.writerow([frame.get(name, 0.0) for name in columns])
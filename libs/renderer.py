@@ -0,0 +1,98 @@
+"""Dirty rectangle renderer.
+
+Instead of redrawing and flipping the whole screen every frame, the
+renderer restores the background only where something was drawn in the
+previous frame and pushes just the changed regions to the display.
+
+DirtyRectRenderer  -- draws sprites over a cached background
+"""
+
+import pygame
+
+class DirtyRectRenderer():
+	"""Draws sprites over a cached background and updates only the
+	changed parts of the display.
+
+	A frame is drawn by calling begin(), then draw() for every sprite and
+	end() to push the frame to the display.
+
+	Attributes:
+		screen (pygame.Surface): Display surface to draw to.
+		background (pygame.Surface): Static image behind all sprites,
+			of the same size as the screen.
+		updatedArea (int): Number of pixels pushed to the display in
+			the last frame.
+	"""
+
+	def __init__(self, screen, background):
+		"""Initializes a DirtyRectRenderer instance.
+
+		Args:
+			screen (pygame.Surface): Display surface to draw to.
+			background (pygame.Surface): Static background image.
+		"""
+
+		self.screen = screen
+		self.background = background
+		self.updatedArea = 0
+		self._previous = []
+		self._current = []
+		self._full = True
+
+	def setBackground(self, background):
+		"""Replaces the background and redraws the whole screen next
+		frame."""
+
+		self.background = background
+		self.invalidate()
+
+	def invalidate(self):
+		"""Redraws the whole screen next frame."""
+
+		self._full = True
+
+	def begin(self):
+		"""Starts a frame by erasing the sprites of the previous one."""
+
+		if self._full:
+			self.screen.blit(self.background, (0, 0))
+		else:
+			for rect in self._previous:
+				self.screen.blit(self.background, rect, rect)
+
+	def draw(self, image, pos, area=None):
+		"""Draws an image and marks its area as changed.
+
+		Args:
+			image (pygame.Surface): Image to draw.
+			pos (tuple or pygame.Rect): Top left corner of the image.
+			area (pygame.Rect): Part of the image to draw, None for
+				the whole image.
+
+		Returns:
+			pygame.Rect: Area of the screen the image was drawn to.
+		"""
+
+		rect = self.screen.blit(image, pos, area)
+		self._current.append(rect)
+		return rect
+
+	def mark(self, rect):
+		"""Marks an area drawn outside of draw() as changed."""
+
+		self._current.append(pygame.Rect(rect))
+
+	def end(self):
+		"""Finishes a frame by updating the changed parts of the
+		display."""
+
+		if self._full:
+			pygame.display.flip()
+			self.updatedArea = self.screen.get_width() * self.screen.get_height()
+			self._full = False
+		else:
+			rects = self._previous + self._current
+			pygame.display.update(rects)
+			self.updatedArea = sum(rect.width * rect.height for rect in rects)
+		self._previous = self._current
+		self._current = []
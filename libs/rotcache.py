@@ -0,0 +1,130 @@
+"""Cache of pre-rotated sprite images.
+
+Rotating a surface with pygame.transform.rotate is expensive and the game
+used to do it several times per frame for every arrow. RotationCache
+renders a sprite at a fixed angular resolution once and then serves the
+rotated surfaces by a simple table lookup.
+
+RotationCache  -- pre-rendered rotations of a single sprite
+memoryUsage  -- total memory taken by all living caches
+"""
+
+import collections
+import weakref
+import pygame
+
+_caches = weakref.WeakSet()
+
+def memoryUsage():
+	"""Returns the number of bytes held by all living rotation caches."""
+
+	return sum(cache.memory for cache in _caches)
+
+class RotationCache():
+	"""Pre-rendered rotations of a single sprite.
+
+	Angles are rounded to the nearest multiple of 'step' degrees, so a
+	cache with step 2 holds at most 180 surfaces. When 'capacity' is set,
+	the least recently used rotations are evicted once the cache grows
+	over the limit.
+
+	Attributes:
+		origImage (pygame.Surface): Unrotated source image.
+		step (float): Angular resolution of the cache in degrees.
+		capacity (int): Maximum number of rotations kept in the cache.
+			None means no limit.
+		memory (int): Number of bytes taken by the cached surfaces.
+		hits (int): Number of lookups served from the cache.
+		misses (int): Number of lookups which had to rotate the image.
+	"""
+
+	def __init__(self, origImage, step=1, capacity=None, preload=True):
+		"""Initializes a RotationCache instance.
+
+		Args:
+			origImage (pygame.Surface): Image to be rotated.
+			step (float): Angular resolution in degrees.
+			capacity (int): Maximum number of cached rotations, None
+				for unlimited.
+			preload (bool): Whether to render all the rotations
+				right away instead of on first use.
+		"""
+
+		self.origImage = origImage
+		self.step = step
+		self.capacity = capacity
+		self.buckets = int(round(360 / step))
+		self.memory = 0
+		self.hits = 0
+		self.misses = 0
+		self._surfaces = collections.OrderedDict()
+		_caches.add(self)
+		if preload:
+			self.preload()
+
+	def preload(self):
+		"""Renders every rotation up to the capacity of the cache."""
+
+		count = self.buckets
+		if self.capacity is not None:
+			count = min(count, self.capacity)
+		for bucket in range(count):
+			if bucket not in self._surfaces:
+				self._store(bucket, self._render(bucket))
+
+	def fill(self, surfaces):
+		"""Stores rotations rendered elsewhere, e.g. taken from an atlas.
+
+		Args:
+			surfaces (list of pygame.Surface): Rotations of the image in
+				the order of their angle, one per step.
+		"""
+
+		for bucket, surface in enumerate(surfaces[:self.buckets]):
+			self._store(bucket, surface)
+
+	def get(self, degrees):
+		"""Returns the image rotated counter-clockwise by 'degrees'.
+
+		Args:
+			degrees (float): Angle of rotation in degrees.
+
+		Returns:
+			pygame.Surface: Rotated image. Do not modify it, the
+				surface is shared.
+		"""
+
+		bucket = int(round(degrees / self.step)) % self.buckets
+		surface = self._surfaces.get(bucket)
+		if surface is None:
+			self.misses += 1
+			surface = self._render(bucket)
+			self._store(bucket, surface)
+		else:
+			self.hits += 1
+			if self.capacity is not None:
+				self._surfaces.move_to_end(bucket)
+		return surface
+
+	def clear(self):
+		"""Drops all the cached rotations."""
+
+		self._surfaces.clear()
+		self.memory = 0
+
+	def _render(self, bucket):
+		return pygame.transform.rotate(self.origImage, bucket * self.step)
+
+	def _store(self, bucket, surface):
+		self._surfaces[bucket] = surface
+		self.memory += _surfaceSize(surface)
+		if self.capacity is not None:
+			while len(self._surfaces) > self.capacity:
+				_, evicted = self._surfaces.popitem(last=False)
+				self.memory -= _surfaceSize(evicted)
+
+	def __len__(self):
+		return len(self._surfaces)
+
+def _surfaceSize(surface):
+	return surface.get_width() * surface.get_height() * surface.get_bytesize()
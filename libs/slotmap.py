@@ -0,0 +1,152 @@
+"""Generational slot map for game entities.
+
+Removing an item from a Python list is O(n) and removing it while the
+list is being iterated skips the next item. SlotMap removes in O(1) by
+moving the last item into the freed place, and items removed during
+iteration are only marked dead and compacted once the iteration ends.
+
+Every inserted item gets a handle which stays valid until the item is
+removed, even though the item moves around inside the map. A stale
+handle never resolves to a different item, as slots carry a generation
+number which changes on every removal.
+
+SlotMap  -- container with O(1) insertion, removal and stable handles
+"""
+
+_REMOVED = object()
+
+class SlotMap():
+	"""Container with O(1) insertion, removal and stable handles.
+
+	Items must be hashable and are compared by their hash, so entity
+	objects are compared by identity. The iteration order is not the
+	insertion order. Items appended during an iteration are not visited
+	by it, items removed during an iteration are not visited either.
+	"""
+
+	def __init__(self, items=()):
+		"""Initializes a SlotMap instance.
+
+		Args:
+			items (iterable): Items to insert.
+		"""
+
+		self._items = []
+		self._slotOf = []
+		self._dense = []
+		self._generation = []
+		self._free = []
+		self._handles = {}
+		self._pending = []
+		self._iterating = 0
+		for item in items:
+			self.append(item)
+
+	def append(self, item):
+		"""Inserts an item.
+
+		Args:
+			item: Item to insert.
+
+		Returns:
+			tuple of int: Handle of the item.
+		"""
+
+		if self._free:
+			slot = self._free.pop()
+		else:
+			slot = len(self._dense)
+			self._dense.append(0)
+			self._generation.append(0)
+		self._dense[slot] = len(self._items)
+		self._items.append(item)
+		self._slotOf.append(slot)
+		handle = (slot, self._generation[slot])
+		self._handles[item] = handle
+		return handle
+
+	def remove(self, item):
+		"""Removes an item.
+
+		Args:
+			item: Item to remove.
+
+		Raises:
+			ValueError: The item is not in the map.
+		"""
+
+		handle = self._handles.pop(item, None)
+		if handle is None:
+			raise ValueError("item not in SlotMap")
+		slot = handle[0]
+		self._generation[slot] += 1
+		dense = self._dense[slot]
+		if self._iterating:
+			self._items[dense] = _REMOVED
+			self._pending.append(dense)
+		else:
+			self._swapRemove(dense)
+
+	def discard(self, item):
+		"""Removes an item if it is present."""
+
+		if item in self._handles:
+			self.remove(item)
+
+	def handleOf(self, item):
+		"""Returns the handle of an item, None if it is not in the map."""
+
+		return self._handles.get(item)
+
+	def get(self, handle):
+		"""Returns the item of a handle, None if it was removed."""
+
+		slot, generation = handle
+		if slot >= len(self._generation) or self._generation[slot] != generation:
+			return None
+		return self._items[self._dense[slot]]
+
+	def clear(self):
+		"""Removes all items."""
+
+		for item in list(self._handles):
+			self.remove(item)
+
+	def _swapRemove(self, dense):
+		last = len(self._items) - 1
+		slot = self._slotOf[dense]
+		if dense != last:
+			moved = self._slotOf[last]
+			self._items[dense] = self._items[last]
+			self._slotOf[dense] = moved
+			self._dense[moved] = dense
+		self._items.pop()
+		self._slotOf.pop()
+		self._free.append(slot)
+
+	def _compact(self):
+		for dense in sorted(self._pending, reverse=True):
+			self._swapRemove(dense)
+		self._pending = []
+
+	def __iter__(self):
+		self._iterating += 1
+		try:
+			items = self._items
+			for i in range(len(items)):
+				item = items[i]
+				if item is not _REMOVED:
+					yield item
+		finally:
+			self._iterating -= 1
+			if not self._iterating and self._pending:
+				self._compact()
+
+	def __len__(self):
+		return len(self._handles)
+
+	def __bool__(self):
+		return bool(self._handles)
+
+	def __contains__(self, item):
+		return item in self._handles
@@ -0,0 +1,113 @@
+"""Uniform grid for broadphase collision detection.
+
+Testing every badger against every arrow is quadratic. SpatialHash sorts
+rectangles into square cells, so that only entities sharing a cell need
+to be tested exactly.
+
+SpatialHash  -- uniform grid hashing rectangles into cells
+"""
+
+class SpatialHash():
+	"""A uniform grid of square cells holding rectangles.
+
+	Items may be any hashable objects. Each item is stored together with
+	its rectangle, which is handed back by queries so callers do not need
+	to compute it again.
+
+	Attributes:
+		cellSize (int): Width and height of a single cell in pixels.
+	"""
+
+	def __init__(self, cellSize=64):
+		"""Initializes a SpatialHash instance.
+
+		Args:
+			cellSize (int): Width and height of a cell in pixels.
+				Should be about the size of the largest item.
+		"""
+
+		self.cellSize = cellSize
+		self._cells = {}
+		self._items = {}
+		self._counter = 0
+
+	def clear(self):
+		"""Removes all items from the grid."""
+
+		self._cells.clear()
+		self._items.clear()
+		self._counter = 0
+
+	def insert(self, item, rect):
+		"""Inserts an item into the grid.
+
+		Args:
+			item: Object to insert.
+			rect (pygame.Rect): Bounding rectangle of the item.
+		"""
+
+		cells = self._cellsFor(rect)
+		self._items[item] = (rect, cells, self._counter)
+		self._counter += 1
+		for cell in cells:
+			bucket = self._cells.get(cell)
+			if bucket is None:
+				self._cells[cell] = {item: None}
+			else:
+				bucket[item] = None
+
+	def remove(self, item):
+		"""Removes an item from the grid if it is present."""
+
+		entry = self._items.pop(item, None)
+		if entry is None:
+			return
+		for cell in entry[1]:
+			bucket = self._cells[cell]
+			del bucket[item]
+			if not bucket:
+				del self._cells[cell]
+
+	def update(self, item, rect):
+		"""Moves an already inserted item to a new rectangle."""
+
+		self.remove(item)
+		self.insert(item, rect)
+
+	def query(self, rect):
+		"""Returns items sharing a cell with the rectangle.
+
+		The candidates are not guaranteed to overlap the rectangle, an
+		exact test is still needed.
+
+		Args:
+			rect (pygame.Rect): Rectangle to look up.
+
+		Returns:
+			list of tuple: Pairs of (item, rect) in insertion order.
+		"""
+
+		found = {}
+		for cell in self._cellsFor(rect):
+			bucket = self._cells.get(cell)
+			if bucket is not None:
+				found.update(bucket)
+		entries = self._items
+		ordered = sorted(found, key=lambda item: entries[item][2])
+		return [(item, entries[item][0]) for item in ordered]
+
+	def _cellsFor(self, rect):
+		size = self.cellSize
+		left = rect.left // size
+		right = (rect.right - 1) // size
+		top = rect.top // size
+		bottom = (rect.bottom - 1) // size
+		return tuple((x, y)
+			for x in range(left, max(left, right) + 1)
+			for y in range(top, max(top, bottom) + 1))
+
+	def __len__(self):
+		return len(self._items)
+
+	def __contains__(self, item):
+		return item in self._items
@@ -0,0 +1,23 @@
+import os
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def game(monkeypatch):
+	"""The game module, imported with the game folder as the working
+	directory, where it finds its resources."""
+
+	pytest.importorskip("pygame")
+	monkeypatch.chdir(ROOT)
+	monkeypatch.syspath_prepend(ROOT)
+	import game
+	return game
+
+@pytest.fixture(params=[False, True], ids=["list", "store"])
+def entityStore(request):
+	"""Runs a test with entities in lists and in the entity store."""
+
+	if request.param:
+		pytest.importorskip("numpy")
+	return request.param
@@ -0,0 +1,44 @@
+import math
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from libs import entitystore
+
+class Owner():
+	pass
+
+def test_grow_past_initial_capacity():
+	store = entitystore.EntityStore(capacity=4)
+	owners = [Owner() for _ in range(300)]
+	for i, owner in enumerate(owners):
+		owner.pos = store.add(owner, i, 2 * i, 0.0, 1.0)
+	assert len(store) == 300
+	assert len(store.x) >= 300
+	store.integrate()
+	for i, owner in enumerate(owners):
+		assert owner.pos.x == i + 1
+		assert owner.pos.y == 2 * i
+
+def test_grow_keeps_velocities():
+	store = entitystore.EntityStore(capacity=1)
+	first = Owner()
+	first.pos = store.add(first, 0, 0, math.pi / 2, 3.0)
+	second = Owner()
+	second.pos = store.add(second, 0, 0, 0.0, 2.0)
+	store.integrate()
+	assert first.pos.x == pytest.approx(0)
+	assert first.pos.y == pytest.approx(3)
+	assert second.pos.x == pytest.approx(2)
+
+def test_save_positions_follow_removal():
+	store = entitystore.EntityStore(capacity=2)
+	owners = [Owner() for _ in range(3)]
+	for i, owner in enumerate(owners):
+		owner.pos = store.add(owner, 10 * i, 0, 0.0, 1.0)
+	store.savePositions()
+	store.integrate()
+	store.remove(owners[0].pos.index)
+	assert owners[2].pos.prevPos == (20, 0)
+	assert owners[2].pos.x == 21
+	assert owners[0].pos.prevPos == (0, 0)
@@ -0,0 +1,35 @@
+from libs import gameloop
+
+class FakeClock():
+	def __init__(self):
+		self.now = 0.0
+		self.slept = []
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.slept.append(seconds)
+		self.now += seconds
+
+def test_frames_are_capped():
+	clock = FakeClock()
+	loop = gameloop.FixedStepLoop(lambda: None, lambda alpha: None, 60,
+		maxFps=100, clock=clock, sleep=clock.sleep)
+	loop.run(lambda: loop.ticks < 60)
+	assert loop.ticks == 60
+	assert 99 <= loop.frames <= 101
+	assert all(seconds > 0 for seconds in clock.slept)
+
+def test_ticks_follow_the_clock():
+	clock = FakeClock()
+	alphas = []
+
+	def render(alpha):
+		alphas.append(alpha)
+		clock.now += 0.004
+
+	loop = gameloop.FixedStepLoop(lambda: None, render, 50, clock=clock)
+	loop.run(lambda: loop.ticks < 10)
+	assert loop.ticks == 10
+	assert all(0 <= alpha < 1 for alpha in alphas)
@@ -0,0 +1,51 @@
+import random
+import pygame
+
+from libs import inputlog
+from libs import inputsource
+from libs import policy
+
+def test_replay_matches_recorded_checksums(game, entityStore, tmp_path):
+	path = str(tmp_path / "game.log")
+	bot = policy.PolicyInput(policy.AimBot(game.Arrow.speed))
+	recorder = inputlog.InputRecorder(bot, path, 60, 7, entityStore)
+	recorded = game.Game(entityStore=entityStore, headless=True,
+		inputSource=recorder, rng=random.Random(7))
+	bot.game = recorded
+	recorder.checksum = recorded.checksum
+	for _ in range(600):
+		recorded.update()
+	recorder.close()
+	assert recorded.shotArrows > 0
+
+	replay = inputlog.ReplayInput(path)
+	assert (replay.tickRate, replay.seed, replay.entityStore) == \
+		(60, 7, entityStore)
+	replayed = game.Game(entityStore=replay.entityStore, headless=True,
+		inputSource=replay, tickRate=replay.tickRate,
+		rng=random.Random(replay.seed))
+	replay.checksum = replayed.checksum
+	replayed.run()
+	assert replay.tick == 600
+	assert replay.verified == 10
+	assert replay.mismatches == []
+	assert replayed.kills == recorded.kills
+	assert replayed.castleHealth == recorded.castleHealth
+
+def test_replay_takes_only_quit_from_live_source(tmp_path):
+	path = str(tmp_path / "game.log")
+	recorded = inputsource.ScriptedInput([((10, 20),
+		[inputsource.click((10, 20))])])
+	recorder = inputlog.InputRecorder(recorded, path, 60, 0)
+	recorder.getEvents()
+	recorder.close()
+
+	quit = pygame.event.Event(pygame.QUIT)
+	live = inputsource.ScriptedInput([((300, 300),
+		[inputsource.click((300, 300)), quit])])
+	replay = inputlog.ReplayInput(path, live)
+	events = replay.getEvents()
+	assert [event.type for event in events] == \
+		[pygame.QUIT, pygame.MOUSEBUTTONDOWN]
+	assert events[1].pos == (10, 20)
+	assert replay.getMousePos() == (10, 20)
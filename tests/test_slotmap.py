@@ -0,0 +1,52 @@
+import pytest
+
+from libs import slotmap
+
+class Item():
+	def __init__(self, value):
+		self.value = value
+
+def test_remove_during_iteration_skips_nothing():
+	items = [Item(i) for i in range(10)]
+	slots = slotmap.SlotMap(items)
+	visited = []
+	for item in slots:
+		visited.append(item.value)
+		if item.value % 3 == 0:
+			slots.remove(item)
+	assert sorted(visited) == list(range(10))
+	assert sorted(item.value for item in slots) == [1, 2, 4, 5, 7, 8]
+	assert len(slots) == 6
+
+def test_items_removed_ahead_are_not_visited():
+	items = [Item(i) for i in range(5)]
+	slots = slotmap.SlotMap(items)
+	visited = []
+	for item in slots:
+		visited.append(item.value)
+		if item.value == 0:
+			slots.remove(items[3])
+	assert 3 not in visited
+	assert len(visited) == 4
+	assert items[3] not in slots
+
+def test_items_appended_during_iteration_are_not_visited():
+	slots = slotmap.SlotMap([Item(0), Item(1)])
+	visited = []
+	for item in slots:
+		visited.append(item.value)
+		slots.append(Item(item.value + 10))
+	assert sorted(visited) == [0, 1]
+	assert len(slots) == 4
+
+def test_stale_handles_do_not_resolve():
+	first, second = Item(0), Item(1)
+	slots = slotmap.SlotMap()
+	handle = slots.append(first)
+	for item in slots:
+		slots.remove(item)
+	assert slots.get(handle) is None
+	assert slots.get(slots.append(second)) is second
+	assert slots.get(handle) is None
+	with pytest.raises(ValueError):
+		slots.remove(first)
@@ -0,0 +1,81 @@
+import random
+import pytest
+
+from libs import inputsource
+from libs import policy
+
+class RecordingInput():
+	"""Input source keeping the frames of another one, to feed them to a
+	second game."""
+
+	def __init__(self, source):
+		self.source = source
+		self.frames = []
+
+	def getEvents(self):
+		events = self.source.getEvents()
+		self.frames.append((self.source.getMousePos(), events))
+		return events
+
+	def getMousePos(self):
+		return self.source.getMousePos()
+
+def playBot(game, entityStore, seed):
+	bot = policy.PolicyInput(policy.AimBot(game.Arrow.speed))
+	source = RecordingInput(bot)
+	session = game.Game(entityStore=entityStore, headless=True,
+		inputSource=source, rng=random.Random(seed))
+	bot.game = session
+	return session, source
+
+def test_restored_game_continues_identically(game, entityStore):
+	original, source = playBot(game, entityStore, 5)
+	for _ in range(1500):
+		original.update()
+	assert len(original.arrowList) > 0
+	assert len(original.badgerList) > 0
+	snapshot = original.snapshot()
+	expected = []
+	for _ in range(500):
+		original.update()
+		expected.append(original.checksum())
+
+	restored = game.Game(entityStore=entityStore, headless=True,
+		inputSource=inputsource.ScriptedInput(source.frames[1500:]),
+		rng=random.Random(99))
+	restored.restore(snapshot)
+	actual = []
+	for _ in range(500):
+		restored.update()
+		actual.append(restored.checksum())
+	assert actual == expected
+	assert restored.snapshot() == original.snapshot()
+
+def test_restore_rewinds_a_game(game, entityStore):
+	session, source = playBot(game, entityStore, 11)
+	for _ in range(300):
+		session.update()
+	snapshot = session.snapshot()
+	checksum = session.checksum()
+	for _ in range(300):
+		session.update()
+	assert session.checksum() != checksum
+	session.restore(snapshot)
+	assert session.checksum() == checksum
+	assert session.snapshot() == snapshot
+
+def test_checksum_follows_seed(game):
+	first, _ = playBot(game, False, 3)
+	second, _ = playBot(game, False, 3)
+	third, _ = playBot(game, False, 4)
+	for _ in range(400):
+		first.update()
+		second.update()
+		third.update()
+	assert first.checksum() == second.checksum()
+	assert first.checksum() != third.checksum()
+
+def test_restore_rejects_other_data(game):
+	session = game.Game(headless=True)
+	with pytest.raises(ValueError):
+		session.restore(bytes(len(session.snapshot())))